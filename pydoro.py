@@ -7,21 +7,48 @@
 import time  # Para manejar las pausas en la ejecución del programa
 import os    # Para interactuar con el sistema operativo (ej. limpiar la pantalla de la consola)
 import random # Para seleccionar frases motivadoras aleatorias
-from playsound import playsound # Para reproducir sonidos al final de cada fase
+import shutil # Para encontrar el reproductor de audio del sistema (afplay/aplay/paplay)
+import subprocess # Para lanzar ese reproductor
+import concurrent.futures # Para reproducir los sonidos sin bloquear la interfaz
 import datetime # Para registrar la fecha y hora y manejar el tiempo en el historial (aunque no se guarda en archivo)
 
 # Importaciones para lectura de teclado no bloqueante (esencial para la pausa)
 import sys
 # select y termios/tty son para sistemas Unix/Linux (como Ubuntu, macOS)
-import select
+import selectors # Espera eficiente de teclas en stdin (epoll/kqueue/select según el sistema)
+import contextlib # Para el gestor de contexto que pone la terminal en modo cbreak
+import re # Para medir el ancho visible de una línea sin sus códigos ANSI
+import unicodedata # Para saber qué caracteres (emojis, CJK) ocupan dos columnas en la terminal
+import functools # Para cachear las barras de progreso y los formatos de tiempo ya construidos
+import collections # defaultdict para acumular tiempos por categoría
+import operator # itemgetter para ordenar los acumulados sin lambdas
+import itertools # chain para recorrer el historial y el segmento en curso sin copiar la lista
+import threading # Para actualizar el menú principal en vivo mientras se espera la elección
 if os.name == 'posix': # Solo importar para sistemas POSIX (Linux, macOS)
     import termios, tty
 elif os.name == 'nt': # Solo importar para Windows
     import msvcrt
+    import ctypes # Para configurar la consola y esperar teclas con la API de Windows
+    import winsound # Reproducción de WAV desde memoria (biblioteca estándar en Windows)
 
 # Nuevo: Registra el tiempo de inicio del script
 script_start_time = datetime.datetime.now()
 
+# En Windows se activa el procesamiento de secuencias ANSI en la consola
+# (ENABLE_VIRTUAL_TERMINAL_PROCESSING) directamente con SetConsoleMode. Se hace una
+# sola vez al importar, así clear_screen() puede usar escapes ANSI sin lanzar procesos.
+if os.name == 'nt':
+    _kernel32 = ctypes.windll.kernel32
+    _kernel32.GetStdHandle.restype = ctypes.c_void_p
+    _kernel32.GetConsoleMode.argtypes = (ctypes.c_void_p, ctypes.POINTER(ctypes.c_uint32))
+    _kernel32.SetConsoleMode.argtypes = (ctypes.c_void_p, ctypes.c_uint32)
+    _STD_OUTPUT_HANDLE = -11
+    _ENABLE_VIRTUAL_TERMINAL_PROCESSING = 0x0004
+    _stdout_handle = _kernel32.GetStdHandle(_STD_OUTPUT_HANDLE)
+    _console_mode = ctypes.c_uint32()
+    if _kernel32.GetConsoleMode(_stdout_handle, ctypes.byref(_console_mode)): # Falla si la salida no es una consola
+        _kernel32.SetConsoleMode(_stdout_handle, _console_mode.value | _ENABLE_VIRTUAL_TERMINAL_PROCESSING)
+
 # ==============================================================================
 # Definición de códigos ANSI para colores y estilos en la terminal
 # Estos códigos son interpretados por la terminal para cambiar el formato del texto.
@@ -38,10 +65,42 @@ CYAN = "\033[96m"        # Cian para un nuevo grupo de categorías
 MAGENTA = "\033[95m"     # Magenta para otro nuevo grupo de categorías
 # La barra de progreso es VERDE como solicitado.
 
+# ==============================================================================
+# Mensajes fijos con formato ANSI
+# Se arman una sola vez al cargar el módulo en lugar de en cada llamada o redibujo.
+# ==============================================================================
+MSG_PAUSE_HINT = f"{BOLD}{LIGHT_GRAY}Presiona [ENTER] para pausar...{RESET}"  # Instrucción bajo el temporizador mientras corre
+MSG_PAUSED = f"{BOLD}{YELLOW}PAUSADO. Presiona [ENTER] para reanudar...{RESET}"  # Instrucción bajo el temporizador en pausa
+MSG_BACK_TO_MENU = f"\n{BOLD}{LIGHT_GRAY}Presiona Enter para volver al menú principal...{RESET}"
+MSG_NEXT_WORK_PROMPT = f"{BOLD}{GREEN}Presiona Enter para iniciar el próximo período de TRABAJO...{RESET}"  # Tras un descanso, antes del siguiente TRABAJO
+MSG_INVALID_OPTION = f"{RED}Opción no válida. Intenta de nuevo.{RESET}"
+MSG_INVALID_NUMBER = f"{RED}Entrada inválida. Por favor, ingresa SOLO NÚMEROS enteros.{RESET}"
+# --- Menú principal ---
+MSG_MENU_TITLE = f"{BOLD}{GREEN}--- Bienvenido al Temporador Pydoro Personalizado ---{RESET}"
+MSG_MENU_MOTTO = f"{BOLD}{LIGHT_GRAY}Outwork others consistently.{RESET}\n"
+MSG_MENU_CATEGORY_HEADER = f"{BOLD}{BLUE}--- Tiempo Acumulado por Categoría General (Sesión Actual) ---{RESET}"
+MSG_MENU_NO_CATEGORY_TIME = f"  {LIGHT_GRAY}Aún no hay tiempo registrado en categorías generales.{RESET}"
+MSG_MENU_SEPARATOR = f"{BOLD}----------------------------------{RESET}\n"
+MSG_MENU_SELECT = f"{BOLD}Selecciona una opción:{RESET}"
+# Cuadro completo del menú: los campos entre llaves se completan con format_map en cada dibujo
+MSG_MENU_FRAME_TEMPLATE = "\n".join([
+    MSG_MENU_TITLE,
+    MSG_MENU_MOTTO,
+    f"{BOLD}{BLUE}Actividad Diaria Actual: {{activity}} (Duración en este segmento: {{segment_duration}}){RESET}\n",
+    MSG_MENU_CATEGORY_HEADER,
+    "{category_lines}",
+    MSG_MENU_SEPARATOR,
+    f"{BOLD}{CYAN}Total de Tiempo Registrado (Script): {{script_time}}{RESET}",
+    "\n", # Espacio para separar
+    MSG_MENU_SELECT,
+    "{menu_options}",
+])
+
 # ==============================================================================
 # Listas de frases motivadoras (Traducidas al Castellano)
 # ==============================================================================
-WORK_QUOTES = [
+# Se guardan como tuplas: son constantes y nunca se modifican
+WORK_QUOTES = (
     "¿Ves lo infinito que eres?",
     "Piensa solo en tu arte.",
     "Blande tu espada como si no tuvieras manos.",
@@ -58,9 +117,9 @@ WORK_QUOTES = [
     "Si alguna vez estuviéramos perfectamente satisfechos, ¿qué sentido tendría el resto de nuestras vidas?",
     "El cielo no ríe. Solo sonríe y observa.",
     "Mira todo en su totalidad, sin esfuerzo."
-]
+)
 
-BREAK_QUOTES = [
+BREAK_QUOTES = (
     "El descanso es parte del viaje.",
     "Incluso el guerrero más fuerte debe dormir.",
     "Un momento de quietud puede revelar el camino a seguir.",
@@ -81,7 +140,30 @@ BREAK_QUOTES = [
     "La montaña permanece porque no persigue al viento.",
     "Un guerrero que nunca se detiene nunca entenderá el camino.",
     "La verdadera fuerza se encuentra en el equilibrio."
-]
+)
+
+# Generador aleatorio propio para elegir frases, independiente del estado global de 'random'
+_quote_rng = random.Random()
+
+def shuffled_quotes(quotes):
+    """
+    Generador infinito de frases: recorre una copia barajada de 'quotes' y, al agotarla,
+    vuelve a barajar. Así no se repite ninguna frase hasta haber mostrado todas, y
+    nunca sale la misma dos veces seguidas (tampoco al pasar de una ronda a la siguiente).
+    Args:
+        quotes (tuple): Las frases a recorrer.
+    """
+    last_quote = None
+    while True:
+        deck = list(quotes)
+        _quote_rng.shuffle(deck)
+        if len(deck) > 1 and deck[0] == last_quote:
+            deck[0], deck[-1] = deck[-1], deck[0]
+        yield from deck
+        last_quote = deck[-1]
+
+work_quote_picker = shuffled_quotes(WORK_QUOTES)
+break_quote_picker = shuffled_quotes(BREAK_QUOTES)
 
 # --- Variables globales para el tiempo categorizado por subcategorías específicas ---
 # Almacena el tiempo en minutos
@@ -95,9 +177,16 @@ total_specific_category_times = {
 }
 
 # --- Variables globales para el seguimiento de actividades diarias (con marcas de tiempo) ---
-daily_activity_log = [] # Lista para almacenar segmentos de actividad: [{'category': 'Estudio', 'start': datetime_obj, 'end': datetime_obj, 'duration': seconds}]
+# Un segmento de actividad registrado: tupla con nombre (más liviana que un diccionario por entrada)
+ActivitySegment = collections.namedtuple('ActivitySegment', 'category start end duration')
+daily_activity_log = [] # Lista para almacenar segmentos de actividad: [ActivitySegment('Estudio', datetime_obj, datetime_obj, seconds)]
 current_daily_activity = None # La categoría de actividad diaria que Pydoro está rastreando actualmente
 last_activity_start_time = None # Marca de tiempo (datetime object) de cuándo comenzó la actividad diaria actual
+# Totales acumulados (en segundos) por categoría de los segmentos ya registrados en daily_activity_log.
+# Se actualiza al registrar cada segmento, así los resúmenes no recorren todo el historial.
+daily_activity_totals = collections.defaultdict(float)
+# Protege el estado de arriba: el menú principal lo lee desde el hilo que lo actualiza en vivo
+state_lock = threading.Lock()
 
 # Nuevas categorías diarias y su orden (¡'Ejercicio' añadido aquí!)
 DEFAULT_DAILY_CATEGORIES = [
@@ -126,67 +215,183 @@ DAILY_CATEGORY_COLORS = {
     'Otros': LIGHT_GRAY
 }
 
+# Inicio ya formateado de cada línea de tiempo acumulado ('  <color>Categoría: <negrita>')
+CATEGORY_LINE_PREFIX = {cat: f"  {DAILY_CATEGORY_COLORS.get(cat, LIGHT_GRAY)}{cat}: {BOLD}" for cat in DEFAULT_DAILY_CATEGORIES}
+
+# Clave de orden para los pares (categoría, segundos) de los tiempos acumulados
+BY_ACCUMULATED_SECONDS = operator.itemgetter(1)
+
 # ==============================================================================
 # Funciones auxiliares para la limpieza de pantalla, colores y temporizador
 # ==============================================================================
+CLEAR_SCREEN = "\x1b[H\x1b[2J" # Cursor al inicio + borrar pantalla
+
 def clear_screen():
-    """Limpia la pantalla de la consola."""
-    os.system('cls' if os.name == 'nt' else 'clear')
+    """
+    Limpia la pantalla de la consola escribiendo la secuencia ANSI directamente.
+    Evita lanzar un proceso 'cls'/'clear' en cada refresco del temporizador.
+    """
+    sys.stdout.write(CLEAR_SCREEN)
+    sys.stdout.flush()
+
+# Secuencias ANSI para guardar/restaurar la posición del cursor. Los temporizadores
+# guardan la posición de la primera línea que cambia (el "ancla") y luego solo
+# reescriben esas líneas, en lugar de limpiar y volver a imprimir toda la pantalla.
+# Ojo: DECRC vuelve a la fila y columna guardadas en la pantalla, no a una posición ligada
+# al texto; si la pantalla se desplaza después de guardar, el ancla queda en la línea equivocada.
+SAVE_CURSOR = "\x1b7"    # DECSC
+RESTORE_CURSOR = "\x1b8" # DECRC
+
+# El menú principal se actualiza desde un hilo mientras el principal espera en input():
+# toda escritura que pueda coincidir con esa actualización se hace con este lock tomado.
+stdout_lock = threading.Lock()
 
+ANSI_CODE_PATTERN = re.compile(r"\x1b\[[0-9;]*[A-Za-z]|\x1b[78]") # Colores, estilos y movimientos de cursor
+
+def char_width(char):
+    """
+    Calcula cuántas columnas de la terminal ocupa un carácter: dos para los anchos
+    (emojis, CJK: East Asian Width 'W' o 'F'), cero para las marcas combinantes y
+    uno para el resto. Es una aproximación por exceso: algunas secuencias (emojis con
+    modificadores o unidos con ZWJ) se ven más angostas de lo calculado, lo que solo
+    hace que el menú deje de actualizarse en vivo antes de lo necesario.
+    """
+    if unicodedata.combining(char):
+        return 0
+    return 2 if unicodedata.east_asian_width(char) in ('W', 'F') else 1
+
+def screen_rows(text, columns):
+    """
+    Calcula cuántas filas de la terminal ocupa una línea, contando el salto automático
+    cuando es más ancha que la pantalla. Un carácter ancho que no entra en la última
+    columna pasa entero a la fila siguiente. Una línea que llena exactamente el ancho se
+    cuenta como dos, porque la terminal puede pasar a la fila siguiente al escribir el
+    próximo carácter.
+    Args:
+        text (str): La línea (puede incluir códigos ANSI, que no ocupan columnas).
+        columns (int): Ancho de la terminal.
+    Returns:
+        int: Cantidad de filas físicas.
+    """
+    rows, column = 1, 0
+    for char in ANSI_CODE_PATTERN.sub("", text):
+        width = char_width(char)
+        if column + width > columns:
+            rows, column = rows + 1, 0
+        column += width
+    return rows + (column == columns)
+
+def redraw_lines(lines, clear_to_end=False):
+    """
+    Reescribe solo las líneas indicadas, empezando en el ancla guardada con
+    SAVE_CURSOR, sin tocar lo que está por encima.
+    Args:
+        lines (list): Líneas consecutivas a reescribir (pueden incluir códigos ANSI).
+        clear_to_end (bool): Borra desde el ancla hasta el final de la pantalla antes de
+                             escribir (para cuando cambia el texto de alguna línea y el
+                             anterior podía ocupar más filas).
+    """
+    out = RESTORE_CURSOR + SAVE_CURSOR # Se vuelve a guardar por si la terminal descarta el ancla al restaurarla
+    if clear_to_end:
+        out += "\x1b[J" + "\n".join(lines)
+    else:
+        out += "\x1b[1E".join(f"\x1b[2K{line}" for line in lines)
+    sys.stdout.write(out)
+    sys.stdout.flush()
+
+@functools.lru_cache(maxsize=4096)
 def format_time_hh_mm_minutes(total_minutes):
     """
     Formatea el tiempo total en minutos a un formato de Horas y Minutos (Hh Mm).
+    El resultado se cachea: en los resúmenes se repiten muchas duraciones.
     """
     if total_minutes < 0:
         total_minutes = 0
-    hours = total_minutes // 60
-    remaining_minutes = total_minutes % 60
+    hours, remaining_minutes = divmod(total_minutes, 60)
     if hours > 0:
         return f"{hours}h {remaining_minutes}m"
     else:
         return f"{remaining_minutes}m"
 
+# Prefijo de estilo del temporizador según los segundos: la posición i corresponde a
+# i segundos (0-10 en ROJO, 11-60 en AMARILLO). A partir de 61 segundos es VERDE.
+TIMER_STYLE_BY_SECOND = (f"{BOLD}{RED}",) * 11 + (f"{BOLD}{YELLOW}",) * 50
+TIMER_STYLE_DEFAULT = f"{BOLD}{GREEN}"
+TWO_DIGITS = tuple(f"{number:02d}" for number in range(100)) # "00".."99" para minutos y segundos
+
 def display_timer(total_seconds):
     """
     Formatea el tiempo total en segundos a un formato de minutos:segundos (MM:SS)
     y le aplica color según el tiempo restante (o transcurrido para temporizador simple).
     """
-    minutes = total_seconds // 60
-    seconds = total_seconds % 60
+    minutes, seconds = divmod(total_seconds, 60)
     
-    if total_seconds <= 10:
-        color = RED
-    elif total_seconds <= 60 and total_seconds > 0:
-        color = YELLOW
-    elif total_seconds > 0:
-        color = GREEN
+    if total_seconds < len(TIMER_STYLE_BY_SECOND):
+        style = TIMER_STYLE_BY_SECOND[max(total_seconds, 0)]
     else:
-        color = GREEN # For 0 seconds or completed timer
+        style = TIMER_STYLE_DEFAULT
+
+    # Sesiones de 100 minutos o más (temporizador simple) se formatean al vuelo
+    minutes_text = TWO_DIGITS[minutes] if 0 <= minutes < 100 else f"{minutes:02d}"
+    return style + minutes_text + ":" + TWO_DIGITS[seconds] + RESET
 
-    return f"{BOLD}{color}{minutes:02d}:{seconds:02d}{RESET}"
+PROGRESS_BAR_LENGTH = 40
 
-def create_progress_bar(current_seconds, total_duration_seconds, bar_length=40):
+@functools.lru_cache(maxsize=None)
+def _bar_states(bar_length):
+    """
+    Devuelve todas las barras coloreadas posibles para un largo dado: la posición i
+    tiene i bloques llenos. Con un solo código de color por tramo (relleno / vacío)
+    en lugar de uno por carácter. Se calcula una sola vez por largo.
+    """
+    return tuple(f"{GREEN}{'█' * filled}{LIGHT_GRAY}{'-' * (bar_length - filled)}{RESET}"
+                 for filled in range(bar_length + 1))
+
+# Las 41 barras del largo por defecto quedan construidas desde el inicio
+PROGRESS_BAR_STATES = _bar_states(PROGRESS_BAR_LENGTH)
+
+# Etiquetas de porcentaje ya coloreadas: PERCENT_LABELS[color][p] -> "<color>p%<reset>"
+PERCENT_LABELS = {color: tuple(f"{color}{percent}%{RESET}" for percent in range(101))
+                  for color in (RED, YELLOW, GREEN)}
+
+def create_progress_bar(current_seconds, total_duration_seconds, bar_length=PROGRESS_BAR_LENGTH):
     """
     Crea una cadena de barra de progreso que representa el avance visualmente.
     """
     if total_duration_seconds == 0:
-        percentage_completed = 100
+        elapsed_seconds, total_duration_seconds = 1, 1 # Temporizador sin duración: 100% completado
     else:
         # Calculate percentage based on time ELAPSED, not remaining, for the bar
         elapsed_seconds = total_duration_seconds - current_seconds
-        percentage_completed = (elapsed_seconds / total_duration_seconds) * 100
+    percentage_completed = (elapsed_seconds / total_duration_seconds) * 100 # Solo para la etiqueta
 
-    filled_chars = int(bar_length * percentage_completed / 100)
+    # Bloques llenos y color con aritmética entera sobre los segundos, sin pasar por el
+    # porcentaje en coma flotante (que en los bordes podía quedarse un bloque corto)
+    filled_chars = elapsed_seconds * bar_length // total_duration_seconds
     
-    colored_bar = f"{GREEN}█{RESET}" * filled_chars + f"{LIGHT_GRAY}-{RESET}" * (bar_length - filled_chars)
+    bar_states = PROGRESS_BAR_STATES if bar_length == PROGRESS_BAR_LENGTH else _bar_states(bar_length)
+    colored_bar = bar_states[filled_chars]
     
     percent_color = GREEN
-    if percentage_completed < 25: # Less than 25% completed (more than 75% remaining)
+    if elapsed_seconds * 4 < total_duration_seconds: # Less than 25% completed (more than 75% remaining)
         percent_color = RED
-    elif percentage_completed < 50: # Less than 50% completed (more than 50% remaining)
+    elif elapsed_seconds * 2 < total_duration_seconds: # Less than 50% completed (more than 50% remaining)
         percent_color = YELLOW
 
-    return f"[{colored_bar}] {percent_color}{percentage_completed:.0f}%{RESET}"
+    # round() redondea igual que el formato :.0f (al par más cercano)
+    percent_label = PERCENT_LABELS[percent_color][round(percentage_completed)]
+
+    return f"[{colored_bar}] {percent_label}"
+
+# Duración máxima (en segundos) para la que se precalculan todas las líneas de progreso
+# de una fase. Por encima de esto se calculan al vuelo para no acaparar memoria.
+MAX_PRECOMPUTED_PHASE_SECONDS = 7200
+
+def countdown_progress_line(current_seconds, total_duration_seconds):
+    """
+    Construye la línea dinámica de la cuenta regresiva (barra de progreso + tiempo restante).
+    """
+    return f"{create_progress_bar(current_seconds, total_duration_seconds)} Tiempo restante: {display_timer(current_seconds)}"
 
 def get_total_script_run_time():
     """
@@ -202,34 +407,282 @@ def get_total_script_run_time():
 # ==============================================================================
 # Funciones auxiliares para la lectura de teclado no bloqueante
 # ==============================================================================
-def kbhit_os_specific():
+# Cada función tiene una versión para Windows (_nt) y otra para Linux/macOS (_posix).
+# La elección se hace una sola vez al importar (más abajo), así los llamados en el
+# bucle de los temporizadores no comparan os.name en cada tecla o tic.
+_stdin_selector = None # Selector con stdin ya registrado; se crea en el primer uso
+
+def _get_stdin_selector():
+    """
+    Devuelve el selector de stdin, creándolo y registrando stdin una sola vez.
+    DefaultSelector elige el mecanismo más eficiente del sistema (epoll, kqueue...);
+    si no admite stdin (por ejemplo, epoll con stdin redirigido desde un archivo),
+    se usa SelectSelector, que funciona con cualquier descriptor.
+    """
+    global _stdin_selector
+    if _stdin_selector is None:
+        selector = selectors.DefaultSelector()
+        try:
+            selector.register(sys.stdin, selectors.EVENT_READ)
+        except (OSError, ValueError):
+            selector.close()
+            selector = selectors.SelectSelector()
+            selector.register(sys.stdin, selectors.EVENT_READ)
+        _stdin_selector = selector
+    return _stdin_selector
+
+def _kbhit_posix():
+    """Verifica si una tecla ha sido presionada sin bloquear la ejecución (Linux/macOS)."""
+    return bool(_get_stdin_selector().select(0))
+
+def _getch_nt():
+    """Lee un solo carácter desde stdin sin mostrarlo en la consola (Windows)."""
+    return msvcrt.getch().decode('utf-8')
+
+def _getch_posix():
+    """
+    Lee un solo carácter desde stdin sin mostrarlo en la consola (Linux/macOS).
+    Debe usarse dentro de cbreak_stdin(): la terminal ya está en modo carácter a
+    carácter, así que basta una única lectura del descriptor, sin cambiar la
+    configuración de la terminal en cada tecla.
     """
-    Verifica si una tecla ha sido presionada sin bloquear la ejecución.
-    Funciona tanto en Windows como en sistemas Unix/Linux.
+    # os.read evita el búfer de sys.stdin, que podría guardarse teclas que el selector ya no vería
+    return os.read(sys.stdin.fileno(), 1).decode('utf-8', errors='replace')
+
+def _drain_pending_keys_nt():
+    """Descarta las teclas que quedaron en el búfer de entrada (Windows)."""
+    # Una sola llamada vacía el búfer de la consola, sin importar cuántas teclas haya
+    if not _kernel32.FlushConsoleInputBuffer(_stdin_handle):
+        while msvcrt.kbhit(): # stdin no es una consola: se descartan una por una
+            msvcrt.getch()
+
+def _drain_pending_keys_posix():
+    """Descarta las teclas que quedaron en el búfer de entrada (Linux/macOS)."""
+    try:
+        # El kernel descarta de una vez toda la entrada pendiente de la terminal
+        termios.tcflush(sys.stdin.fileno(), termios.TCIFLUSH)
+    except termios.error: # stdin no es una terminal (por ejemplo, una tubería)
+        if _kbhit_posix():
+            os.read(sys.stdin.fileno(), 4096)
+
+@contextlib.contextmanager
+def cbreak_stdin():
     """
-    if os.name == 'nt': # Para Windows
-        return msvcrt.kbhit()
-    else: # Para Linux/macOS
-        # select.select on sys.stdin works on Unix-like systems
-        rlist, _, _ = select.select([sys.stdin], [], [], 0)
-        return bool(rlist)
+    Pone stdin en modo cbreak (sin eco y carácter a carácter) mientras dura el bloque,
+    para que una tecla esté disponible en cuanto se presiona, sin esperar a Enter.
+    Restaura la configuración original de la terminal al salir, incluso si el bloque
+    termina por una excepción (por ejemplo, Ctrl+C). En Windows o si stdin no es una
+    terminal no hace nada.
+    """
+    if os.name != 'posix' or not sys.stdin.isatty():
+        yield
+        return
+    fd = sys.stdin.fileno()
+    old_settings = termios.tcgetattr(fd)
+    tty.setcbreak(fd) # A diferencia de setraw, mantiene Ctrl+C como KeyboardInterrupt
+    try:
+        yield
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
+
+if os.name == 'nt':
+    # msvcrt no ofrece una espera con timeout; el handle de entrada de la consola
+    # queda "señalado" cuando hay eventos pendientes, así que se espera sobre él.
+    _kernel32.WaitForSingleObject.argtypes = (ctypes.c_void_p, ctypes.c_uint32)
+    _kernel32.WaitForSingleObject.restype = ctypes.c_uint32
+    _kernel32.FlushConsoleInputBuffer.argtypes = (ctypes.c_void_p,)
+    # Para descartar eventos que no son teclas (ver _discard_non_key_events_nt)
+    _kernel32.GetNumberOfConsoleInputEvents.argtypes = (ctypes.c_void_p, ctypes.POINTER(ctypes.c_uint32))
+    _kernel32.PeekConsoleInputW.argtypes = (ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint32, ctypes.POINTER(ctypes.c_uint32))
+    _kernel32.ReadConsoleInputW.argtypes = (ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint32, ctypes.POINTER(ctypes.c_uint32))
+    _STD_INPUT_HANDLE = -10
+    _WAIT_OBJECT_0 = 0x0
+    _WAIT_TIMEOUT = 0x102
+    _INPUT_RECORD_SIZE = 20 # sizeof(INPUT_RECORD): WORD EventType + unión de 16 bytes alineada a 4
+    _stdin_handle = _kernel32.GetStdHandle(_STD_INPUT_HANDLE)
+
+def _discard_non_key_events_nt():
+    """
+    Quita de la consola los eventos pendientes que no son teclas (soltar una tecla, mouse,
+    foco, cambio de tamaño). msvcrt.kbhit() los ignora pero no los saca del buffer, y mientras
+    sigan ahí el handle queda señalado y WaitForSingleObject vuelve de inmediato.
+    Los eventos se espían primero y solo se descartan si después kbhit() sigue sin ver teclas:
+    así ninguna tecla que llegue en el medio se pierde.
+    Returns:
+        bool: True si la consola quedó lista para volver a esperar (o ya hay una tecla para leer),
+              False si alguna llamada a la API de la consola falló.
+    """
+    pending = ctypes.c_uint32()
+    if not _kernel32.GetNumberOfConsoleInputEvents(_stdin_handle, ctypes.byref(pending)):
+        return False
+    if not pending.value:
+        return True
+    records = ctypes.create_string_buffer(_INPUT_RECORD_SIZE * pending.value)
+    peeked = ctypes.c_uint32()
+    if not _kernel32.PeekConsoleInputW(_stdin_handle, records, pending.value, ctypes.byref(peeked)):
+        return False
+    if msvcrt.kbhit():
+        return True # Entre los eventos hay una tecla: la lee quien espera
+    # Los eventos espiados ya estaban antes de que kbhit() dijera que no hay teclas, así que ninguno lo es
+    discarded = ctypes.c_uint32()
+    return bool(_kernel32.ReadConsoleInputW(_stdin_handle, records, peeked.value, ctypes.byref(discarded)))
+
+def _wait_for_key_nt(timeout_seconds):
+    """
+    Espera como máximo 'timeout_seconds' a que se presione una tecla (Windows).
+    Bloquea en WaitForSingleObject sobre el handle de la consola, que vuelve en
+    cuanto llega entrada, en lugar de despertar el proceso cada 100 ms. Los eventos
+    que no son teclas se descartan para que la siguiente espera vuelva a bloquear.
+    Returns:
+        str: La tecla leída, o None si se agotó el tiempo sin entrada.
+    """
+    deadline = time.monotonic() + timeout_seconds
+    while not msvcrt.kbhit():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        result = _kernel32.WaitForSingleObject(_stdin_handle, max(1, int(remaining * 1000)))
+        if result == _WAIT_TIMEOUT or msvcrt.kbhit():
+            continue
+        # El handle quedó señalado sin teclas: son eventos de mouse, foco, soltar tecla... que se descartan.
+        # Solo si la espera o la consola fallan (ej. stdin redirigido) se sondea cada 100 ms para no girar en vacío.
+        if result != _WAIT_OBJECT_0 or not _discard_non_key_events_nt():
+            time.sleep(min(0.1, remaining))
+    return _getch_nt()
+
+def _wait_for_key_posix(timeout_seconds):
+    """
+    Espera como máximo 'timeout_seconds' a que se presione una tecla (Linux/macOS).
+    Bloquea en una sola espera del selector de stdin, que vuelve en cuanto hay
+    entrada, en lugar de despertar el proceso cada 100 ms para preguntar.
+    Returns:
+        str: La tecla leída, o None si se agotó el tiempo sin entrada.
+    """
+    if not _get_stdin_selector().select(timeout_seconds):
+        return None
+    return _getch_posix()
+
+# Funciones públicas de teclado, elegidas una sola vez según el sistema operativo:
+#   drain_pending_keys()     -> descarta las teclas pendientes (p. ej. varios Enter seguidos)
+#   wait_for_key(timeout)    -> espera una tecla como máximo 'timeout' segundos (None si no hubo)
+if os.name == 'nt': # Para Windows
+    drain_pending_keys = _drain_pending_keys_nt
+    wait_for_key = _wait_for_key_nt
+else: # Para Linux/macOS
+    drain_pending_keys = _drain_pending_keys_posix
+    wait_for_key = _wait_for_key_posix
 
-def getch_os_specific():
+# ==============================================================================
+# Funciones para los sonidos de notificación
+# ==============================================================================
+SOUND_FILES = ('bell.wav', 'notif.wav') # bell.wav: fin de trabajo, notif.wav: fin de descanso
+
+def load_sound_file(sound_file):
+    """
+    Lee un archivo de sonido completo en memoria.
+    Returns:
+        bytes: El contenido del archivo, o None si no se pudo leer.
     """
-    Lee un solo carácter desde stdin sin mostrarlo en la consola.
-    Funciona para Windows y sistemas Unix/Linux.
+    try:
+        with open(sound_file, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+# En Windows los WAV se leen una sola vez al iniciar (winsound los reproduce desde memoria),
+# así el final de cada fase no paga la apertura y lectura del archivo antes de que suene.
+# En macOS/Linux el reproductor recibe la ruta, así que no se cargan.
+SOUND_CACHE = {}
+if os.name == 'nt':
+    SOUND_CACHE = {sound_file: load_sound_file(sound_file) for sound_file in SOUND_FILES}
+
+# Reproductores de audio de línea de comandos que vienen con el sistema, en orden de
+# preferencia: afplay (macOS), aplay (ALSA) y paplay (PulseAudio/PipeWire) en Linux.
+# En Windows se usa winsound, así que no se busca ninguno.
+SOUND_PLAYER_COMMANDS = (('afplay',), ('aplay', '-q'), ('paplay',))
+SOUND_PLAYER = None
+if os.name != 'nt':
+    SOUND_PLAYER = next((command for command in SOUND_PLAYER_COMMANDS if shutil.which(command[0])), None)
+
+@functools.lru_cache(maxsize=None)
+def _get_playsound():
     """
-    if os.name == 'nt': # Para Windows
-        return msvcrt.getch().decode('utf-8')
-    else: # Para Linux/macOS
-        fd = sys.stdin.fileno()
-        old_settings = termios.tcgetattr(fd)
-        try:
-            tty.setraw(fd)
-            ch = sys.stdin.read(1)
-        finally:
-            termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
-        return ch
+    Importa playsound solo la primera vez que hace falta (es pesado: en Linux arrastra
+    GObject) y solo si no hay un reproductor del sistema. El resultado queda cacheado.
+    Returns:
+        callable: La función playsound, o None si la librería no está instalada.
+    """
+    try:
+        from playsound import playsound # Respaldo para reproducir sonidos si no hay un reproductor del sistema
+    except ImportError:
+        return None
+    return playsound
+
+def _play_sound_worker(sound_file):
+    """
+    Reproduce el sonido (bloqueante). Se ejecuta en un hilo aparte desde play_notification_sound(),
+    así que no imprime nada: si falla, devuelve el aviso para que lo muestre el hilo principal.
+    Returns:
+        str: El aviso a mostrar si no se pudo reproducir, o None si sonó bien.
+    """
+    if os.name == 'nt':
+        player = "winsound"
+    elif SOUND_PLAYER is not None:
+        player = SOUND_PLAYER[0]
+    else:
+        player = "playsound"
+    try:
+        if os.name == 'nt':
+            sound_data = SOUND_CACHE.get(sound_file)
+            if sound_data is None:
+                raise FileNotFoundError(f"No se encontró '{sound_file}'")
+            # SND_MEMORY no admite SND_ASYNC, por eso la asincronía la da el hilo
+            winsound.PlaySound(sound_data, winsound.SND_MEMORY)
+        elif SOUND_PLAYER is not None:
+            subprocess.run([*SOUND_PLAYER, sound_file], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        else:
+            playsound = _get_playsound()
+            if playsound is None:
+                raise RuntimeError("No se encontró afplay, aplay, paplay ni playsound")
+            playsound(sound_file)
+    except Exception as e:
+        return (f"{RED}ADVERTENCIA: No se pudo reproducir el sonido de notificación '{sound_file}' con {player}: {e}{RESET}\n"
+                f"{RED}Asegúrate de que '{sound_file}' exista en la misma carpeta y {player} esté instalado correctamente.{RESET}")
+    return None
+
+# Un único hilo de trabajo reutilizable para todos los sonidos: no se crea un hilo
+# por notificación y, si llegaran dos seguidas, suenan una tras otra sin solaparse.
+_sound_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="pydoro-sound")
+
+def play_notification_sound(sound_file):
+    """
+    Reproduce un sonido de notificación en segundo plano, para que la pausa
+    posterior al fin de fase transcurra mientras suena en lugar de después
+    (la espera total es max(duración del sonido, pausa) y no la suma).
+    Args:
+        sound_file (str): Nombre del archivo (ej. 'bell.wav').
+    Returns:
+        concurrent.futures.Future: Se completa al terminar el sonido (ver wait_for_notification_sound).
+    """
+    return _sound_pool.submit(_play_sound_worker, sound_file)
+
+def wait_for_notification_sound(sound_future, pause_seconds):
+    """
+    Hace la pausa de lectura de fin de fase mientras suena la notificación y, si el sonido
+    falló, muestra el aviso desde el hilo principal (nunca en medio de otra pantalla).
+    Siempre dura 'pause_seconds', falle o no el sonido.
+    Args:
+        sound_future (concurrent.futures.Future): Lo que devolvió play_notification_sound().
+        pause_seconds (float): Duración de la pausa.
+    """
+    pause_end = time.monotonic() + pause_seconds
+    try:
+        warning = sound_future.result(timeout=pause_seconds)
+    except concurrent.futures.TimeoutError:
+        warning = None # Sigue sonando: si falla más tarde, ya no interrumpe la pantalla siguiente
+    if warning:
+        print(warning)
+    time.sleep(max(0.0, pause_end - time.monotonic()))
 
 # ==============================================================================
 # Funciones para categorización de tiempo de estudio/trabajo/lectura
@@ -262,10 +715,10 @@ def prompt_specific_work_category(main_category):
             elif 1 <= opcion_int <= len(subcategories):
                 return subcategories[opcion_int - 1]
             else:
-                print(f"{RED}Opción no válida. Intenta de nuevo.{RESET}")
+                print(MSG_INVALID_OPTION)
                 time.sleep(1)
         except ValueError:
-            print(f"{RED}Entrada inválida. Por favor, ingresa SOLO NÚMEROS enteros.{RESET}")
+            print(MSG_INVALID_NUMBER)
             time.sleep(1)
 
 def assign_time_to_specific_category(duration_minutes, specific_category):
@@ -275,7 +728,7 @@ def assign_time_to_specific_category(duration_minutes, specific_category):
         duration_minutes (int): Duración en minutos.
         specific_category (str): Nombre de la subcategoría (ej. "Programación", "Inclub").
     """
-    global total_specific_category_times
+    # Solo se modifica el contenido del diccionario, no hace falta 'global'
     if specific_category in total_specific_category_times:
         total_specific_category_times[specific_category] += duration_minutes
     else:
@@ -319,13 +772,87 @@ def display_specific_category_times():
     print(f"\n{BOLD}{CYAN}Total de Tiempo Registrado: {get_total_script_run_time()}{RESET}")
 
     print(f"{LIGHT_GRAY}(Estos totales de categorías se reinician al cerrar el programa){RESET}")
-    input(f"\n{BOLD}{LIGHT_GRAY}Presiona Enter para volver al menú principal...{RESET}")
+    input(MSG_BACK_TO_MENU)
 
 
+# ==============================================================================
+# Bucle de tics compartido por la cuenta regresiva y el temporizador simple
+# ==============================================================================
+def run_tick_loop(render_lines, render_footer, duration_seconds=None, stop_keys=()):
+    """
+    Bucle común de los temporizadores. Mide el tiempo transcurrido con time.monotonic()
+    (descontando las pausas, así el dibujo y la lectura de teclas no acumulan retraso),
+    reescribe solo las líneas dinámicas cuando cambia el segundo y alterna la pausa
+    con Enter. Debe llamarse dentro de cbreak_stdin() y con el ancla (SAVE_CURSOR)
+    ya guardada en la primera línea dinámica.
+
+    Args:
+        render_lines (callable): Recibe los segundos transcurridos (int) y devuelve la
+                                 lista de líneas dinámicas a dibujar.
+        render_footer (callable): Recibe si está en pausa (bool) y devuelve las líneas que
+                                  van debajo de las dinámicas (instrucciones).
+        duration_seconds (int): Si se indica, el bucle termina al alcanzar esta duración.
+                                None para contar sin límite (hasta Ctrl+C).
+        stop_keys (tuple): Teclas (en minúscula) que terminan el bucle anticipadamente.
+    Returns:
+        str: La tecla de stop_keys que detuvo el bucle, o None si se completó la duración.
+    """
+    start_monotonic = time.monotonic()
+    paused_total_seconds = 0.0
+    pause_started = None # Marca de time.monotonic() del inicio de la pausa actual (None = corriendo)
+    drawn_lines = None # Últimas líneas dinámicas escritas en pantalla
+
+    while True:
+        now = pause_started if pause_started is not None else time.monotonic()
+        elapsed = now - start_monotonic - paused_total_seconds
+        if duration_seconds is not None:
+            elapsed = min(elapsed, duration_seconds)
+        elapsed_whole_seconds = int(elapsed)
+
+        lines = render_lines(elapsed_whole_seconds)
+        # Solo se escribe si algo cambió (en pausa, o si se despertó por una tecla
+        # antes del siguiente segundo, las líneas son las mismas que ya están en pantalla)
+        if lines != drawn_lines:
+            redraw_lines(lines)
+            drawn_lines = lines
+
+        if duration_seconds is not None and elapsed >= duration_seconds:
+            return None # El período se completó
+
+        # Espera una tecla como máximo hasta que cambie el segundo mostrado
+        key = wait_for_key(1.0 if pause_started is not None else (elapsed_whole_seconds + 1) - elapsed)
+        if key is None:
+            continue
+
+        key = key.lower() # Convierte la tecla a minúscula
+        if key in ('\r', '\n'): # Tecla Enter para pausar/reanudar
+            if pause_started is None:
+                pause_started = time.monotonic()
+            else:
+                paused_total_seconds += time.monotonic() - pause_started
+                pause_started = None
+            # Al pausar/reanudar solo cambian las instrucciones bajo las líneas dinámicas
+            redraw_lines(lines + render_footer(pause_started is not None), clear_to_end=True)
+            # Limpia cualquier tecla en el búfer para evitar múltiples activaciones
+            drain_pending_keys()
+        elif key in stop_keys:
+            return key
+
 # ==============================================================================
 # Función principal para la cuenta regresiva de cualquier período
 # ==============================================================================
-def countdown_period(duration_seconds, phase_name, quote,
+# Tipos de fase de un ciclo Pomodoro. Cada uno indexa PHASE_META, que reúne su color,
+# el nombre que se muestra y el sonido que suena al terminar.
+PHASE_WORK = 0
+PHASE_SHORT_BREAK = 1
+PHASE_LONG_BREAK = 2
+PHASE_META = (
+    (BLUE, "TRABAJO", 'bell.wav'),
+    (ORANGE, "DESCANSO CORTO", 'notif.wav'),
+    (ORANGE, "DESCANSO LARGO", 'notif.wav'),
+)
+
+def countdown_period(duration_seconds, phase_kind, quote,
                      pomodoros_completed_session, short_breaks_completed_session, long_breaks_completed_session,
                      daily_activity_name=None):
     """
@@ -335,6 +862,9 @@ def countdown_period(duration_seconds, phase_name, quote,
     Permite terminar un Pomodoro de TRABAJO anticipadamente presionando 'Q'.
     Al finalizar, reproduce un sonido.
 
+    Args:
+        phase_kind (int): PHASE_WORK, PHASE_SHORT_BREAK o PHASE_LONG_BREAK.
+
     Returns:
         tuple: (actual_seconds_elapsed_in_phase, status)
             actual_seconds_elapsed_in_phase (int): Segundos reales que pasaron en esta fase.
@@ -345,71 +875,79 @@ def countdown_period(duration_seconds, phase_name, quote,
                 'user_cancelled_all': Usuario presionó Ctrl+C y eligió cancelar todos los ciclos.
                 'user_skip_phase': Usuario presionó Ctrl+C y eligió saltar solo esta fase.
     """
-    phase_color = BLUE if "TRABAJO" in phase_name else ORANGE if "DESCANSO" in phase_name else RESET
+    phase_color, phase_name, sound_file = PHASE_META[phase_kind]
+    is_work_phase = phase_kind == PHASE_WORK
     
     total_duration_seconds_initial = duration_seconds
-    current_seconds = duration_seconds
-    start_time_phase = datetime.datetime.now() # Marca de tiempo cuando la fase actual comienza
-    
-    is_paused = False
+    # Marca de inicio de la fase en nanosegundos (entero): para medir lo transcurrido no hace
+    # falta la hora del calendario ni crear objetos timedelta
+    start_ns_phase = time.perf_counter_ns()
 
     display_phase_name = phase_name
     if daily_activity_name:
         display_phase_name = f"{phase_name} ({daily_activity_name})"
 
-    try: # Bloque principal para capturar KeyboardInterrupt (Ctrl+C)
-        while current_seconds >= 0:
-            clear_screen()
-            print(f"{BOLD}{phase_color}--- FASE DE {display_phase_name} ---{RESET}")
-            
-            print(f"{BOLD}Sesión: {GREEN}Pomodoros: {pomodoros_completed_session}{RESET} | {ORANGE}Descansos: {short_breaks_completed_session}{RESET} | {BLUE}Descansos largos: {long_breaks_completed_session}{RESET}") 
-            print("-" * 60)
+    # Instrucción de acción para el usuario (y su variante en pausa)
+    if is_work_phase:
+        action_prompt = f"{BOLD}{LIGHT_GRAY}Presiona [ENTER] para pausar. Presiona [Q] para terminar este {phase_name} anticipadamente.{RESET}"
+    else:
+        action_prompt = MSG_PAUSE_HINT
 
-            print(f"\n{LIGHT_GRAY}\"{quote}\"{RESET}\n")
+    # Para una duración fija solo hay duration_seconds+1 estados posibles de la línea
+    # de progreso: se construyen todos una vez y en cada tic basta con indexar.
+    progress_frames = None
+    if duration_seconds <= MAX_PRECOMPUTED_PHASE_SECONDS:
+        progress_frames = [countdown_progress_line(s, total_duration_seconds_initial) for s in range(duration_seconds + 1)]
 
-            print(f"{create_progress_bar(current_seconds, total_duration_seconds_initial)} Tiempo restante: {display_timer(current_seconds)}")
+    try: # Bloque principal para capturar KeyboardInterrupt (Ctrl+C)
+        # El marco estático (cabecera, contadores y frase) no cambia durante la fase:
+        # se imprime una sola vez y se guarda el cursor en la línea de la barra.
+        # Todo el marco se arma en una lista y se emite con una sola escritura
+        frame = [
+            CLEAR_SCREEN + f"{BOLD}{phase_color}--- FASE DE {display_phase_name} ---{RESET}",
+            f"{BOLD}Sesión: {GREEN}Pomodoros: {pomodoros_completed_session}{RESET} | {ORANGE}Descansos: {short_breaks_completed_session}{RESET} | {BLUE}Descansos largos: {long_breaks_completed_session}{RESET}",
+            "-" * 60,
+            "",
+            f"{LIGHT_GRAY}\"{quote}\"{RESET}",
+            "",
+            SAVE_CURSOR + countdown_progress_line(duration_seconds, total_duration_seconds_initial),
+            action_prompt,
+        ]
+        sys.stdout.write("\n".join(frame) + "\n")
+        sys.stdout.flush()
+
+        def render_progress(elapsed_seconds):
+            # Solo se reescribe la línea de la barra de progreso y el tiempo restante
+            current_seconds = total_duration_seconds_initial - elapsed_seconds
+            if progress_frames is not None:
+                return [progress_frames[current_seconds]]
+            return [countdown_progress_line(current_seconds, total_duration_seconds_initial)]
+
+        with cbreak_stdin(): # La terminal vuelve a su modo normal antes de cualquier input()
+            stop_key = run_tick_loop(render_progress,
+                                     lambda is_paused: [MSG_PAUSED if is_paused else action_prompt],
+                                     duration_seconds=duration_seconds,
+                                     stop_keys=('q',) if is_work_phase else ()) # 'Q' termina anticipadamente (solo en TRABAJO)
+        early_end_requested = stop_key == 'q'
+
+        if early_end_requested:
+            elapsed_seconds_during_phase = (time.perf_counter_ns() - start_ns_phase) // 1_000_000_000
+            clear_screen()
+            print(f"\n{BOLD}{YELLOW}¡{phase_name} terminado con anticipación!{RESET}")
             
-            # Instrucción de acción para el usuario
-            action_prompt = ""
-            if "TRABAJO" in phase_name:
-                action_prompt = f"{BOLD}{LIGHT_GRAY}Presiona [ENTER] para pausar. Presiona [Q] para terminar este {phase_name} anticipadamente.{RESET}"
-            else:
-                action_prompt = f"{BOLD}{LIGHT_GRAY}Presiona [ENTER] para pausar...{RESET}"
-            print(action_prompt)
-
-            # Bucle para verificar la entrada del teclado de forma no bloqueante
-            for _ in range(10): # Reduce el tiempo de sleep y bucle más para mayor capacidad de respuesta (10 * 0.1s = 1s)
-                if kbhit_os_specific():
-                    key = getch_os_specific().lower() # Lee la tecla y la convierte a minúscula
-                    if key in ('\r', '\n'): # Tecla Enter para pausar/reanudar
-                        is_paused = not is_paused 
-                        # Limpia cualquier tecla en el búfer para evitar múltiples activaciones
-                        while kbhit_os_specific():
-                            getch_os_specific()
-                        break 
-                    elif key == 'q' and "TRABAJO" in phase_name: # Tecla 'Q' para terminar anticipadamente (solo en TRABAJO)
-                        elapsed_seconds_during_phase = int((datetime.datetime.now() - start_time_phase).total_seconds())
-                        clear_screen()
-                        print(f"\n{BOLD}{YELLOW}¡{phase_name} terminado con anticipación!{RESET}")
-                        
-                        if elapsed_seconds_during_phase > 0: # Solo pregunta si hay tiempo transcurrido
-                            print(f"{BOLD}{LIGHT_GRAY}Tiempo transcurrido en esta fase: {format_time_hh_mm_minutes(elapsed_seconds_during_phase // 60)}{RESET}")
-                            confirm_early_end = input(f"\n{BOLD}¿Quieres registrar estos {format_time_hh_mm_minutes(elapsed_seconds_during_phase // 60)} como tiempo productivo? {GREEN}[S]{RESET}/{RED}[N]{RESET}: ").lower().strip()
-                            if confirm_early_end == 's':
-                                return (elapsed_seconds_during_phase, 'early_end_registered')
-                            else:
-                                print(f"{LIGHT_GRAY}Tiempo no registrado. Continuando con los ciclos.{RESET}")
-                                time.sleep(1) # Pequeña pausa antes de continuar
-                                return (elapsed_seconds_during_phase, 'early_end_not_registered')
-                        else: # Si no pasó tiempo, no hay nada que registrar
-                            print(f"{LIGHT_GRAY}No se registró tiempo. Continuando con los ciclos.{RESET}")
-                            time.sleep(1)
-                            return (0, 'early_end_not_registered')
-
-                time.sleep(0.1) # Pausa breve para no consumir CPU
-
-            if not is_paused:
-                current_seconds -= 1
+            if elapsed_seconds_during_phase > 0: # Solo pregunta si hay tiempo transcurrido
+                print(f"{BOLD}{LIGHT_GRAY}Tiempo transcurrido en esta fase: {format_time_hh_mm_minutes(elapsed_seconds_during_phase // 60)}{RESET}")
+                confirm_early_end = input(f"\n{BOLD}¿Quieres registrar estos {format_time_hh_mm_minutes(elapsed_seconds_during_phase // 60)} como tiempo productivo? {GREEN}[S]{RESET}/{RED}[N]{RESET}: ").lower().strip()
+                if confirm_early_end == 's':
+                    return (elapsed_seconds_during_phase, 'early_end_registered')
+                else:
+                    print(f"{LIGHT_GRAY}Tiempo no registrado. Continuando con los ciclos.{RESET}")
+                    time.sleep(1) # Pequeña pausa antes de continuar
+                    return (elapsed_seconds_during_phase, 'early_end_not_registered')
+            else: # Si no pasó tiempo, no hay nada que registrar
+                print(f"{LIGHT_GRAY}No se registró tiempo. Continuando con los ciclos.{RESET}")
+                time.sleep(1)
+                return (0, 'early_end_not_registered')
 
         # Si el bucle termina, el período se completó naturalmente
         elapsed_seconds_during_phase = total_duration_seconds_initial # Se completó la duración total
@@ -417,21 +955,16 @@ def countdown_period(duration_seconds, phase_name, quote,
         print(f"{BOLD}{phase_color}--- FASE DE {display_phase_name} TERMINADA ---{RESET}")
         print(f"¡{BOLD}{phase_color}{display_phase_name}{RESET} completado! Es hora de cambiar de fase.\n")
 
-        # Reproducir sonido
-        try:
-            sound_file = 'bell.wav' if "TRABAJO" in phase_name else 'notif.wav'
-            playsound(sound_file) 
-        except Exception as e:
-            print(f"{RED}ADVERTENCIA: No se pudo reproducir el sonido de notificación '{sound_file}': {e}{RESET}")
-            print(f"{RED}Asegúrate de que '{sound_file}' exista en la misma carpeta y playsound esté instalado correctamente.{RESET}")
+        # Reproducir sonido (en segundo plano, mientras dura la pausa de lectura)
+        sound_future = play_notification_sound(sound_file)
 
-        time.sleep(3) # Pausa para que el usuario lea el mensaje
+        wait_for_notification_sound(sound_future, 3) # Pausa para que el usuario lea el mensaje
         return (elapsed_seconds_during_phase, 'completed')
 
     except KeyboardInterrupt: # Captura Ctrl+C
         clear_screen()
         choice = input(f"{RED}{BOLD}¡{phase_name} interrumpido por el usuario!{RESET}\n{BOLD}¿Qué quieres hacer? {YELLOW}[S]{RESET}altar a siguiente fase / {RED}[C]{RESET}ancelar todos los ciclos: ").lower().strip()
-        elapsed_seconds_during_phase = int((datetime.datetime.now() - start_time_phase).total_seconds()) # Calcular tiempo transcurrido hasta la interrupción
+        elapsed_seconds_during_phase = (time.perf_counter_ns() - start_ns_phase) // 1_000_000_000 # Calcular tiempo transcurrido hasta la interrupción
         if choice == 'c':
             print(f"{BOLD}{RED}¡Ciclos cancelados! Vuelve cuando estés listo. 👋{RESET}")
             time.sleep(1)
@@ -472,9 +1005,9 @@ def run_pomodoro(work_minutes=90, short_break_minutes=15, long_break_minutes=45,
         print(f"\n{BOLD}--- CICLO {i}/{num_cycles} ---{RESET}")
         
         # --- Fase de TRABAJO ---
-        work_quote = random.choice(WORK_QUOTES)
+        work_quote = next(work_quote_picker)
         
-        elapsed_seconds_work, work_outcome = countdown_period(work_seconds, "TRABAJO", work_quote,
+        elapsed_seconds_work, work_outcome = countdown_period(work_seconds, PHASE_WORK, work_quote,
                                                               pomodoros_completed_session_total + current_set_pomodoros, 
                                                               short_breaks_completed_session_total + current_set_short_breaks, 
                                                               long_breaks_completed_session_total + current_set_long_breaks,
@@ -524,19 +1057,20 @@ def run_pomodoro(work_minutes=90, short_break_minutes=15, long_break_minutes=45,
             # Si el usuario eligió saltar la fase actual, vamos a la siguiente iteración del bucle.
             # Esto significa que el descanso asociado a este ciclo también se salta.
             if i < num_cycles:
-                input(f"{BOLD}{GREEN}Presiona Enter para iniciar el próximo período de TRABAJO...{RESET}")
+                input(MSG_NEXT_WORK_PROMPT)
             continue # Salta al siguiente ciclo (próxima iteración del bucle for)
 
         # --- Fase de DESCANSO (corto o largo) ---
         # Esta lógica solo se ejecuta si la fase de trabajo no fue cancelada completamente o saltada.
         is_long_break = (i % num_cycles == 0) # El descanso largo es cada 'num_cycles' pomodoros
-        break_message = "DESCANSO LARGO" if is_long_break else "DESCANSO CORTO"
+        break_kind = PHASE_LONG_BREAK if is_long_break else PHASE_SHORT_BREAK
+        break_message = PHASE_META[break_kind][1]
         break_duration = long_break_seconds if is_long_break else short_break_seconds
-        break_quote = random.choice(BREAK_QUOTES)
+        break_quote = next(break_quote_picker)
 
         input(f"{BOLD}{ORANGE}Presiona Enter para iniciar el {break_message}...{RESET}")
         
-        elapsed_seconds_break, break_outcome = countdown_period(break_duration, break_message, break_quote,
+        elapsed_seconds_break, break_outcome = countdown_period(break_duration, break_kind, break_quote,
                                                                 pomodoros_completed_session_total + current_set_pomodoros, 
                                                                 short_breaks_completed_session_total + current_set_short_breaks, 
                                                                 long_breaks_completed_session_total + current_set_long_breaks,
@@ -556,7 +1090,7 @@ def run_pomodoro(work_minutes=90, short_break_minutes=15, long_break_minutes=45,
             pass # Continúa al siguiente ciclo como si el descanso hubiera terminado (no se añade al contador de descansos)
 
         if i < num_cycles:
-            input(f"{BOLD}{GREEN}Presiona Enter para iniciar el próximo período de TRABAJO...{RESET}")
+            input(MSG_NEXT_WORK_PROMPT)
 
     clear_screen()
     print(f"{BOLD}{BLUE}¡Todos los ciclos Pomodoro completados en este conjunto! ¡Excelente trabajo! ✨{RESET}")
@@ -581,48 +1115,39 @@ def run_simple_timer(total_pomodoros_session, total_short_breaks_session, total_
     print(f"{BOLD}{LIGHT_GRAY}Presiona Ctrl+C en cualquier momento para detener.{RESET}\n")
 
     current_elapsed_seconds = 0
-    is_paused = False
     
     try:
-        while True:
-            clear_screen()
-            print(f"{BOLD}{BLUE}--- {display_title} ---{RESET}")
-            print(f"{BOLD}Sesión: {GREEN}Pomodoros: {total_pomodoros_session}{RESET} | {ORANGE}Descansos: {total_short_breaks_session}{RESET} | {BLUE}Descansos largos: {total_long_breaks_session}{RESET}") 
-            print("-" * 60)
-
-            display_str = display_timer(current_elapsed_seconds)
-            
-            print(f"\n{BOLD}Tiempo transcurrido: {display_str}{RESET}")
-            
-            # Nuevo: Muestra el tiempo total transcurrido del script
-            print(f"{BOLD}{CYAN}Total de Tiempo Registrado (Script): {get_total_script_run_time()}{RESET}")
-
-            if is_paused:
-                print(f"\n{BOLD}{YELLOW}PAUSADO. Presiona [ENTER] para reanudar...{RESET}")
-            else:
-                print(f"\n{BOLD}{LIGHT_GRAY}Presiona [ENTER] para pausar...{RESET}") 
-
-            for _ in range(10): # Reduce sleep time and loop more for responsiveness
-                if kbhit_os_specific():
-                    key = getch_os_specific()
-                    if key in ('\r', '\n'):
-                        is_paused = not is_paused 
-                        # Clear any buffered keys
-                        while kbhit_os_specific():
-                            getch_os_specific()
-                        break 
-                    else:
-                        pass 
-                time.sleep(0.1) # Sleep for a short interval
-
-
-            if not is_paused:
-                current_elapsed_seconds += 1
+        # Marco estático: se imprime una vez y el cursor se guarda en la línea del tiempo
+        frame = [
+            CLEAR_SCREEN + f"{BOLD}{BLUE}--- {display_title} ---{RESET}",
+            f"{BOLD}Sesión: {GREEN}Pomodoros: {total_pomodoros_session}{RESET} | {ORANGE}Descansos: {total_short_breaks_session}{RESET} | {BLUE}Descansos largos: {total_long_breaks_session}{RESET}",
+            "-" * 60,
+            "",
+            SAVE_CURSOR, # Tiempo transcurrido (se dibuja dentro del bucle)
+            "",          # Total de Tiempo Registrado (se dibuja dentro del bucle)
+            "",
+            MSG_PAUSE_HINT,
+        ]
+        sys.stdout.write("\n".join(frame) + "\n")
+        sys.stdout.flush()
+
+        def render_elapsed(elapsed_seconds):
+            nonlocal current_elapsed_seconds
+            current_elapsed_seconds = elapsed_seconds # Se conserva para el resumen tras Ctrl+C
+            # Solo se reescriben el tiempo transcurrido y el total del script
+            return [
+                f"{BOLD}Tiempo transcurrido: {display_timer(elapsed_seconds)}{RESET}",
+                # Nuevo: Muestra el tiempo total transcurrido del script
+                f"{BOLD}{CYAN}Total de Tiempo Registrado (Script): {get_total_script_run_time()}{RESET}"
+            ]
+
+        with cbreak_stdin(): # Se restaura la terminal antes del input() de Ctrl+C
+            run_tick_loop(render_elapsed, lambda is_paused: ["", MSG_PAUSED if is_paused else MSG_PAUSE_HINT]) # Sin límite: termina con Ctrl+C
 
     except KeyboardInterrupt:
         clear_screen()
         # Modificación para que el temporizador simple también ofrezca asignar tiempo
-        elapsed_minutes = int(current_elapsed_seconds / 60) # Calculate minutes here
+        elapsed_minutes = int(current_elapsed_seconds // 60) # Calculate minutes here
         
         print(f"{RED}{BOLD}¡Temporizador Simple interrumpido!{RESET}")
         choice = input(f"{BOLD}Tiempo transcurrido: {display_timer(current_elapsed_seconds)}. ¿Qué quieres hacer? {YELLOW}[S]{RESET}umar tiempo y volver al menú principal / {RED}[C]{RESET}ancelar y no sumar tiempo: ").lower().strip()
@@ -651,7 +1176,7 @@ def run_simple_timer(total_pomodoros_session, total_short_breaks_session, total_
     # This part will rarely be reached unless current_elapsed_seconds is capped and reaches max.
     # Given its nature as an "upward" timer, it's typically interrupted by Ctrl+C.
     # However, if it were to complete (e.g., if it had a target duration), the logic below would apply.
-    elapsed_minutes = int(current_elapsed_seconds / 60) # Calculate minutes here
+    elapsed_minutes = int(current_elapsed_seconds // 60) # Calculate minutes here
     print(f"{BOLD}{BLUE}Temporizador Simple finalizado automáticamente. Tiempo transcurrido: {display_timer(current_elapsed_seconds)}{RESET}")
     if daily_activity_name in SPECIFIC_SUBCATEGORY_MAPPING: # Use daily_activity_name to check mapping
         specific_category_assigned = prompt_specific_work_category(daily_activity_name)
@@ -672,21 +1197,23 @@ def run_simple_timer(total_pomodoros_session, total_short_breaks_session, total_
 # ==============================================================================
 # Funciones auxiliares para formatear tiempos (Mantengo las funciones auxiliares aquí)
 # ==============================================================================
+@functools.lru_cache(maxsize=4096)
 def format_time_hh_mm_seconds(total_seconds): 
     """
     Convierte el total de segundos a formato HH:MM (solo horas y minutos).
+    Pasar segundos enteros (int) para que la caché sirva.
     """
-    hours = int(total_seconds // 3600)
-    minutes = int((total_seconds % 3600) // 60)
-    return f"{hours:02d}:{minutes:02d}"
+    hours, remaining_seconds = divmod(int(total_seconds), 3600)
+    return f"{hours:02d}:{remaining_seconds // 60:02d}"
 
+@functools.lru_cache(maxsize=4096)
 def format_time_hh_mm_ss(total_seconds):
     """
     Convierte el total de segundos a formato HH:MM:SS.
+    Pasar segundos enteros (int) para que la caché sirva.
     """
-    hours = int(total_seconds // 3600)
-    minutes = int((total_seconds % 3600) // 60)
-    seconds = int(total_seconds % 60)
+    hours, remaining_seconds = divmod(int(total_seconds), 3600)
+    minutes, seconds = divmod(remaining_seconds, 60)
     return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
 
 
@@ -702,34 +1229,36 @@ def change_current_daily_activity(new_category_name):
     """
     global daily_activity_log, current_daily_activity, last_activity_start_time
 
-    current_time = datetime.datetime.now()
+    with state_lock:
+        current_time = datetime.datetime.now()
 
-    # Log the segment that is *ending* (if there was one)
-    # Only log if new_category_name is DIFFERENT from current_daily_activity OR if we are explicitly stopping (new_category_name is None)
-    if current_daily_activity is not None and last_activity_start_time is not None and \
-       (new_category_name != current_daily_activity or new_category_name is None):
+        # Log the segment that is *ending* (if there was one)
+        # Only log if new_category_name is DIFFERENT from current_daily_activity OR if we are explicitly stopping (new_category_name is None)
+        if current_daily_activity is not None and last_activity_start_time is not None and \
+           (new_category_name != current_daily_activity or new_category_name is None):
         
-        duration_seconds = (current_time - last_activity_start_time).total_seconds()
-        # Only log if there was actual time spent (e.g., more than a very tiny fraction of a second)
-        if duration_seconds >= 1.0: # Consider a threshold to avoid logging negligible time, now 1 second
-            daily_activity_log.append({
-                'category': current_daily_activity,
-                'start': last_activity_start_time,
-                'end': current_time,
-                'duration': duration_seconds
-            })
-            # print(f"DEBUG: Logged segment: {current_daily_activity} ({last_activity_start_time.strftime('%H:%M:%S')} - {current_time.strftime('%H:%M:%S')}) Dur: {format_time_hh_mm_ss(duration_seconds)}") # Debug
-
-    # Start the new segment (only if a new category name is provided OR if current_daily_activity was None and we're starting fresh)
-    if new_category_name is not None and new_category_name != current_daily_activity:
-        current_daily_activity = new_category_name
-        last_activity_start_time = current_time # The new segment starts from THIS moment
-        # print(f"DEBUG: New activity started: {current_daily_activity} at {last_activity_start_time.strftime('%H:%M:%S')}") # Debug
-    elif new_category_name is None: # Explicitly stopping
-        current_daily_activity = None
-        last_activity_start_time = None
-    # If new_category_name is the same as current_daily_activity, we do nothing.
-    # This ensures no new log entry is created and last_activity_start_time is not reset.
+            duration_seconds = (current_time - last_activity_start_time).total_seconds()
+            # Only log if there was actual time spent (e.g., more than a very tiny fraction of a second)
+            if duration_seconds >= 1.0: # Consider a threshold to avoid logging negligible time, now 1 second
+                daily_activity_log.append(ActivitySegment(
+                    category=current_daily_activity,
+                    start=last_activity_start_time,
+                    end=current_time,
+                    duration=duration_seconds
+                ))
+                daily_activity_totals[current_daily_activity] += duration_seconds
+                # print(f"DEBUG: Logged segment: {current_daily_activity} ({last_activity_start_time.strftime('%H:%M:%S')} - {current_time.strftime('%H:%M:%S')}) Dur: {format_time_hh_mm_ss(duration_seconds)}") # Debug
+
+        # Start the new segment (only if a new category name is provided OR if current_daily_activity was None and we're starting fresh)
+        if new_category_name is not None and new_category_name != current_daily_activity:
+            current_daily_activity = new_category_name
+            last_activity_start_time = current_time # The new segment starts from THIS moment
+            # print(f"DEBUG: New activity started: {current_daily_activity} at {last_activity_start_time.strftime('%H:%M:%S')}") # Debug
+        elif new_category_name is None: # Explicitly stopping
+            current_daily_activity = None
+            last_activity_start_time = None
+        # If new_category_name is the same as current_daily_activity, we do nothing.
+        # This ensures no new log entry is created and last_activity_start_time is not reset.
 
 
 def prompt_activity_category_choice(categories_list, is_initial_setup=False):
@@ -737,113 +1266,130 @@ def prompt_activity_category_choice(categories_list, is_initial_setup=False):
     Prompts the user to select an activity category.
     Returns the chosen category name or None if cancelled.
     """
+    # Respuestas válidas -> categoría elegida ('0' cancela y devuelve None)
+    valid_choices = {str(i): cat for i, cat in enumerate(categories_list, 1)}
+    if is_initial_setup or current_daily_activity is not None:
+        valid_choices['0'] = None
+
+    can_cancel = not is_initial_setup and current_daily_activity is not None
+    menu_lines = [f"  {BOLD}{i}. {CYAN}{cat}{RESET}" for i, cat in enumerate(categories_list, 1)]
+    # Option 0 is only for returning to menu if tracking is already active and it's not initial setup
+    if can_cancel:
+        menu_lines.append(f"\n  {BOLD}{0}. {RED}Cancelar / Volver al Menú (Mantener '{current_daily_activity}') {RESET}")
+    choice_prompt = f"\n{BOLD}Elige una opción ({'0-' if can_cancel else ''}1-{len(categories_list)}): {RESET}"
+
+    # El menú se dibuja una sola vez; ante una entrada inválida solo se muestra el error y se vuelve a preguntar
+    clear_screen()
+    if is_initial_setup:
+        print(f"{BOLD}{GREEN}--- Selecciona tu Actividad Diaria Actual ---{RESET}\n")
+        print(f"{LIGHT_GRAY}Para empezar a registrar el tiempo, elige la actividad que estás realizando ahora.{RESET}\n")
+    else:
+        print(f"{BOLD}{GREEN}--- Cambiar Actividad Diaria General ---{RESET}\n")
+        print(f"{LIGHT_GRAY}Tu actividad actual es: {BOLD}{BLUE}{current_daily_activity}{RESET}\n")
+        print(f"{LIGHT_GRAY}Selecciona la nueva actividad que vas a realizar:{RESET}\n")
+    print(f"{BOLD}{YELLOW}Opciones de Actividad:{RESET}")
+    print("\n".join(menu_lines))
+
     while True:
-        clear_screen()
-        if is_initial_setup:
-            print(f"{BOLD}{GREEN}--- Selecciona tu Actividad Diaria Actual ---{RESET}\n")
-            print(f"{LIGHT_GRAY}Para empezar a registrar el tiempo, elige la actividad que estás realizando ahora.{RESET}\n")
+        choice_str = input(choice_prompt).strip()
+        if choice_str in valid_choices:
+            return valid_choices[choice_str]
+        if choice_str.isdecimal():
+            print(MSG_INVALID_OPTION)
         else:
-            print(f"{BOLD}{GREEN}--- Cambiar Actividad Diaria General ---{RESET}\n")
-            print(f"{LIGHT_GRAY}Tu actividad actual es: {BOLD}{BLUE}{current_daily_activity}{RESET}\n")
-            print(f"{LIGHT_GRAY}Selecciona la nueva actividad que vas a realizar:{RESET}\n")
-            
-        print(f"{BOLD}{YELLOW}Opciones de Actividad:{RESET}")
-        for i, cat in enumerate(categories_list):
-            print(f"  {BOLD}{i+1}. {CYAN}{cat}{RESET}")
-        
-        # Option 0 is only for returning to menu if tracking is already active and it's not initial setup
-        if not is_initial_setup and current_daily_activity is not None:
-            print(f"\n  {BOLD}{0}. {RED}Cancelar / Volver al Menú (Mantener '{current_daily_activity}') {RESET}")
-
-        try:
-            choice_str = input(f"\n{BOLD}Elige una opción ({'0-' if not is_initial_setup and current_daily_activity is not None else ''}1-{len(categories_list)}): {RESET}").strip()
-            choice = int(choice_str)
-
-            if choice == 0 and not is_initial_setup and current_daily_activity is not None:
-                return None # Indicates cancellation
-            elif choice == 0 and is_initial_setup: # If user tries to cancel initial setup
-                return None 
-
-            if 1 <= choice <= len(categories_list):
-                return categories_list[choice - 1]
-            else:
-                print(f"{RED}Opción no válida. Intenta de nuevo.{RESET}")
-                time.sleep(1)
-        except ValueError:
             print(f"{RED}Entrada inválida. Por favor, ingresa un número entero.{RESET}")
-            time.sleep(1)
 
 
-def show_daily_activity_summary(daily_activity_data_log, current_active_category, last_active_start_time, final_summary=False):
+def show_daily_activity_summary(daily_activity_data_log, current_active_category, last_active_start_time, final_summary=False,
+                                category_totals=None):
     """
     Muestra el resumen de tiempo para todas las categorías diarias, tanto por segmento como acumulado.
     Calcula el tiempo de la actividad actual en curso para el resumen acumulado.
+    Args:
+        category_totals (dict): Totales ya acumulados por categoría para los segmentos de
+                                daily_activity_data_log (ej. daily_activity_totals). Si es None,
+                                se calculan recorriendo el historial.
     """
+    color_for = DAILY_CATEGORY_COLORS.get # Se resuelve una vez para todo el detalle de segmentos
+    # Un solo instante para todo el resumen: el segmento en curso y su aporte al acumulado usan la misma duración
+    now = datetime.datetime.now()
+    running_duration = None
+    if current_active_category is not None and last_active_start_time is not None:
+        running_duration = (now - last_active_start_time).total_seconds()
     clear_screen()
     print(f"{BOLD}{BLUE}--- Resumen de Actividades Diarias Generales ({'Sesión Actual' if not final_summary else 'Final'}) ---{RESET}\n")
     
     # Detalle de Segmentos de Actividad (Moved to top as requested)
     print(f"{BOLD}Detalle de Segmentos de Actividad:{RESET}")
-    # Add the current running segment to the display list temporarily if not final summary
-    temp_display_log = list(daily_activity_data_log) # Make a copy
-    if not final_summary and current_active_category is not None and last_active_start_time is not None:
-        current_dt_for_display = datetime.datetime.now()
-        # Make sure 'start' is a datetime object when adding to temp_display_log
-        temp_display_log.append({
-            'category': current_active_category,
-            'start': last_active_start_time, 
-            'end': current_dt_for_display, # Display up to now
-            'duration': (current_dt_for_display - last_active_start_time).total_seconds()
-        })
-
-    if not temp_display_log:
+    # Add the current running segment to the display temporarily if not final summary (sin copiar el historial)
+    running_segment = ()
+    if not final_summary and running_duration is not None:
+        running_segment = (ActivitySegment(
+            category=current_active_category,
+            start=last_active_start_time, 
+            end=now, # Display up to now
+            duration=running_duration
+        ),)
+
+    if not daily_activity_data_log and not running_segment:
         print(f"  {LIGHT_GRAY}No hay segmentos de actividad registrados en esta sesión.{RESET}")
     else:
-        # Sort by start time for chronological order
-        sorted_segments = sorted(temp_display_log, key=lambda x: x['start'])
-        for entry in sorted_segments:
-            category_color = DAILY_CATEGORY_COLORS.get(entry['category'], LIGHT_GRAY) # Get color for category
-            start_str = entry['start'].strftime('%H:%M') # Format to HH:MM
-            end_str = entry['end'].strftime('%H:%M')     # Format to HH:MM
-            duration_seconds_segment = entry['duration'] # Get duration in seconds
-            duration_str = format_time_hh_mm_ss(duration_seconds_segment) # Format duration to HH:MM:SS
-            print(f"  {category_color}{entry['category']}: {duration_str} ({start_str} - {end_str}){RESET}")
+        # Ya está en orden cronológico: change_current_daily_activity() agrega cada segmento
+        # al terminar, con inicio igual al fin del anterior, y el segmento en curso va al final
+        for entry in itertools.chain(daily_activity_data_log, running_segment):
+            category_color = color_for(entry.category, LIGHT_GRAY) # Get color for category
+            # Format to HH:MM (sin strftime, que interpreta el formato y la configuración regional en cada llamada)
+            start_str = f"{entry.start.hour:02d}:{entry.start.minute:02d}"
+            end_str = f"{entry.end.hour:02d}:{entry.end.minute:02d}"
+            duration_seconds_segment = entry.duration # Get duration in seconds
+            duration_str = format_time_hh_mm_ss(int(duration_seconds_segment)) # Format duration to HH:MM:SS
+            print(f"  {category_color}{entry.category}: {duration_str} ({start_str} - {end_str}){RESET}")
 
     print(f"\n{BOLD}Tiempo Acumulado por Categoría:{RESET}")
-    # Calculate accumulated time per category
-    accumulated_times = {cat: 0 for cat in DEFAULT_DAILY_CATEGORIES}
-    # Add any activity not in default categories
-    for entry in daily_activity_data_log:
-        accumulated_times[entry['category']] = accumulated_times.get(entry['category'], 0) + entry['duration']
+    # Calculate accumulated time per category (categories with no time never appear)
+    accumulated_times = collections.defaultdict(float)
+    if category_totals is not None:
+        accumulated_times.update(category_totals) # Copia: el segmento en curso no debe sumarse al total global
+    else:
+        for entry in daily_activity_data_log:
+            accumulated_times[entry.category] += entry.duration
 
     # Add the duration of the current partial segment that is still running
-    if current_active_category is not None and last_active_start_time is not None:
-        current_running_duration = (datetime.datetime.now() - last_active_start_time).total_seconds()
-        if current_running_duration > 0:
-            accumulated_times[current_active_category] = accumulated_times.get(current_active_category, 0) + current_running_duration
+    if running_duration is not None and running_duration > 0:
+        accumulated_times[current_active_category] += running_duration
             
-    sorted_accumulated = sorted(accumulated_times.items(), key=lambda item: item[1], reverse=True)
-    has_accumulated_data = False
-    for category, seconds in sorted_accumulated:
-        if seconds > 0:
-            category_color = DAILY_CATEGORY_COLORS.get(category, LIGHT_GRAY) # Get color for category
-            # Convert seconds to minutes for HH:MM format
-            total_minutes = int(seconds / 60)
-            print(f"  {category_color}{category}: {BOLD}{format_time_hh_mm_minutes(total_minutes)}{RESET}") # Use format_time_hh_mm_minutes
-            has_accumulated_data = True
+    # Solo se ordenan las categorías con tiempo (las que se muestran)
+    nonzero_accumulated = [item for item in accumulated_times.items() if item[1] > 0]
+    for category, seconds in sorted(nonzero_accumulated, key=BY_ACCUMULATED_SECONDS, reverse=True):
+        # Convert seconds to minutes for HH:MM format
+        total_minutes = int(seconds // 60)
+        print(f"{CATEGORY_LINE_PREFIX[category]}{format_time_hh_mm_minutes(total_minutes)}{RESET}") # Use format_time_hh_mm_minutes
     
-    if not has_accumulated_data:
+    if not nonzero_accumulated:
         print(f"  {LIGHT_GRAY}Aún no hay tiempo registrado en categorías generales en esta sesión.{RESET}")
 
     # Nuevo: Muestra el tiempo total transcurrido del script en el resumen de actividades
     print(f"\n{BOLD}{CYAN}Total de Tiempo Registrado (Script): {get_total_script_run_time()}{RESET}")
 
     if not final_summary:
-        input(f"\n{BOLD}{LIGHT_GRAY}Presiona Enter para volver al menú principal...{RESET}")
+        input(MSG_BACK_TO_MENU)
     else:
         print(f"\n{LIGHT_GRAY}¡Estos totales se reinician al cerrar el programa!{RESET}")
         time.sleep(2) # Give user time to read final message
 
+
+def finalize_session():
+    """
+    Cierra el seguimiento de actividades: registra el segmento en curso y muestra el resumen final.
+    Si no hay una actividad en curso (la sesión ya se cerró o nunca empezó) no hace nada, así que
+    puede llamarse desde la opción de salir, desde el manejo de CTRL+C y desde el cierre del programa sin repetir el resumen.
+    """
+    if current_daily_activity is None:
+        return
+    change_current_daily_activity(None) # Esto loguea el último segmento y pone las variables globales a None
+    show_daily_activity_summary(daily_activity_log, None, None, final_summary=True, # Pasamos None para actividad activa ya que se logueó
+                                category_totals=daily_activity_totals)
+
 # ==============================================================================
 # Función principal para manejar la configuración del usuario y el bucle de sesión
 # ==============================================================================
@@ -864,6 +1410,7 @@ def main():
     # Inicialización de variables globales para el seguimiento de actividades diarias y específicas
     global daily_activity_log, current_daily_activity, last_activity_start_time, total_specific_category_times
     daily_activity_log = [] # Reset for new session
+    daily_activity_totals.clear()
     current_daily_activity = None
     last_activity_start_time = None
     # Reset specific category times for a new session
@@ -885,280 +1432,303 @@ def main():
     print(f"{BOLD}{GREEN}Actividad inicial establecida: {current_daily_activity}{RESET}")
     time.sleep(1)
 
-    while True:
-        try:
-            # Calculate and display current segment's elapsed time *for display only*
-            current_segment_display_duration_seconds = 0
-            if last_activity_start_time:
-                current_segment_display_duration_seconds = (datetime.datetime.now() - last_activity_start_time).total_seconds()
-            
-            clear_screen()
-            print(f"{BOLD}{GREEN}--- Bienvenido al Temporador Pydoro Personalizado ---{RESET}")
-            print(f"{BOLD}{LIGHT_GRAY}Outwork others consistently.{RESET}\n")
-
-            # Mostrar la actividad diaria actual y la duración de su segmento actual
-            # NOTA: Este tiempo no se actualiza en tiempo real cada segundo mientras esperas input
-            print(f"{BOLD}{BLUE}Actividad Diaria Actual: {current_daily_activity} (Duración en este segmento: {format_time_hh_mm_ss(current_segment_display_duration_seconds)}){RESET}\n")
-
-            # REEMPLAZO: Resumen de la Sesión Actual (Pomodoro) por Tiempo Acumulado por Categoría
-            print(f"{BOLD}{BLUE}--- Tiempo Acumulado por Categoría General (Sesión Actual) ---{RESET}")
-            # Calculate accumulated time per category for main menu display
-            current_accumulated_times = {cat: 0 for cat in DEFAULT_DAILY_CATEGORIES}
-            for entry in daily_activity_log:
-                current_accumulated_times[entry['category']] = current_accumulated_times.get(entry['category'], 0) + entry['duration']
-            
-            # Add the duration of the current partial segment that is still running
-            if current_daily_activity is not None and last_activity_start_time is not None:
-                current_running_duration_main_menu = (datetime.datetime.now() - last_activity_start_time).total_seconds()
-                if current_running_duration_main_menu > 0:
-                    current_accumulated_times[current_daily_activity] = current_accumulated_times.get(current_daily_activity, 0) + current_running_duration_main_menu
-            
-            sorted_current_accumulated = sorted(current_accumulated_times.items(), key=lambda item: item[1], reverse=True)
-            has_current_accumulated_data = False
-            for category, seconds in sorted_current_accumulated:
-                if seconds > 0:
-                    category_color = DAILY_CATEGORY_COLORS.get(category, LIGHT_GRAY)
-                    total_minutes = int(seconds / 60)
-                    print(f"  {category_color}{category}: {BOLD}{format_time_hh_mm_minutes(total_minutes)}{RESET}")
-                    has_current_accumulated_data = True
-            
-            if not has_current_accumulated_data:
-                print(f"  {LIGHT_GRAY}Aún no hay tiempo registrado en categorías generales.{RESET}")
-            print(f"{BOLD}----------------------------------{RESET}\n")
+    # --- Acciones del menú principal ---
+    # Cada opción del menú apunta directamente a su función; el menú se arma como
+    # (color, texto, acción) y la elección del usuario se resuelve con un diccionario
+    # en lugar de una cadena de if/elif. Una acción devuelve True para salir de Pydoro.
+    def _run_pomodoro_flow():
+        nonlocal total_pomodoros_session, total_short_breaks_session, total_long_breaks_session
+        # No llamar a change_current_daily_activity aquí.
+        # El Pomodoro es parte del segmento de la actividad diaria actual.
+        # Los valores por defecto ahora vienen de la definición de run_pomodoro
 
-            # Nuevo: Muestra el tiempo total transcurrido del script en el menú principal
-            print(f"{BOLD}{CYAN}Total de Tiempo Registrado (Script): {get_total_script_run_time()}{RESET}")
-            print("\n") # Espacio para separar
+        work, short_break, long_break, cycles = 90, 15, 45, 4 # Default values (aligned with run_pomodoro defaults)
 
+        while True:
+            customize_choice = input(f"{BOLD}¿Quieres personalizar la configuración para este conjunto de ciclos? ({GREEN}s{RESET}/{RED}n{RESET}): {RESET}").lower().strip()
+            if customize_choice in ['s', 'n']:
+                break
+            else:
+                print(f"{RED}Opción no válida. Por favor, ingresa 's' o 'n'.{RESET}")
+                time.sleep(1)
 
-            print(f"{BOLD}Selecciona una opción:{RESET}")
-            # Determine if Pomodoro/Simple Timer options should be shown
-            allow_pomodoro_timer = current_daily_activity in SPECIFIC_SUBCATEGORY_MAPPING
+        if customize_choice == 's':
+            while True:
+                try:
+                    work = int(input(f"{YELLOW}Duración del período de TRABAJO (minutos): {RESET}"))
+                    short_break = int(input(f"{YELLOW}Duración del DESCANSO CORTO (minutos): {RESET}"))
+                    long_break = int(input(f"{YELLOW}Duración del DESCANSO LARGO (minutos): {RESET}"))
+                    cycles = int(input(f"{YELLOW}Número de ciclos Pomodoro (ej. 4 para descanso largo): {RESET}"))
 
-            menu_options = []
-            option_counter = 1 # Start option numbering from 1
-
-            # Only add Pomodoro and Simple Timer options if allowed by current activity
-            if allow_pomodoro_timer:
-                menu_options.append(f"  {GREEN}{option_counter}. Iniciar nuevo conjunto de ciclos Pomodoro{RESET}")
-                option_pomodoro = str(option_counter)
-                option_counter += 1
-                menu_options.append(f"  {BLUE}{option_counter}. Iniciar Temporizador Simple (cuenta hacia arriba){RESET}")
-                option_simple_timer = str(option_counter)
-                option_counter += 1
-
-            # Common options always available
-            menu_options.append(f"  {ORANGE}{option_counter}. Ver Tiempo Productivo Categorizado (Estudio/Trabajo/Lectura){RESET}") # Renamed
-            option_specific_cat_summary = str(option_counter)
-            option_counter += 1
-
-            menu_options.append(f"  {YELLOW}{option_counter}. Cambiar Actividad Diaria General{RESET}")
-            option_change_daily_activity = str(option_counter)
-            option_counter += 1
-            
-            menu_options.append(f"  {MAGENTA}{option_counter}. Actualizar Vista del Menú (refresca duración){RESET}") # Nueva opción
-            option_refresh_view = str(option_counter)
-            option_counter += 1
+                    if work <= 0 or short_break <= 0 or long_break <= 0 or cycles <= 0:
+                        print(f"{RED}Las duraciones y el número de ciclos deben ser valores POSITIVOS. Intenta de nuevo.{RESET}")
+                        time.sleep(1)
+                    else:
+                        break
+                except ValueError:
+                    print(MSG_INVALID_NUMBER)
+                    time.sleep(1)
+
+        completed_pom, completed_short_break, completed_long_break = run_pomodoro(
+            work, short_break, long_break, cycles,
+            total_pomodoros_session, total_short_breaks_session, total_long_breaks_session,
+            daily_activity_name=current_daily_activity # Pass daily category to countdown for display
+        )
+
+        total_pomodoros_session += completed_pom
+        total_short_breaks_session += completed_short_break
+        total_long_breaks_session += completed_long_break
+        # total_work_minutes_session and total_break_minutes_session are now updated
+        # directly by assign_time_to_specific_category if specific,
+        # or not tracked at this higher level if the user chose not to sum to specific.
+        # The Pomodoros completed counter is the main high-level metric here.
 
-            menu_options.append(f"  {LIGHT_GRAY}{option_counter}. Ver Resumen de Actividades Diarias Generales{RESET}")
-            option_daily_summary = str(option_counter)
-            option_counter += 1
+        clear_screen()
+        print(f"{BOLD}{BLUE}¡Conjunto de ciclos Pomodoro completado!{RESET}")
+        print(f"{BOLD}Resumen de este conjunto:{RESET}")
+        print(f"{GREEN}Pomodoros completados: {completed_pom}{RESET}")
+        print(f"{ORANGE}Descansos cortos completados: {completed_short_break}{RESET}")
+        print(f"{BLUE}Descansos largos completados: {completed_long_break}{RESET}")
+        input(MSG_BACK_TO_MENU)
+        # ELIMINADO: No reiniciar last_activity_start_time aquí.
+        # last_activity_start_time = datetime.datetime.now()
+
+    def _run_simple_flow():
+        # No llamar a change_current_daily_activity aquí.
+        # El temporizador simple es parte del segmento de la actividad diaria actual.
+        elapsed_minutes_simple = run_simple_timer(
+            total_pomodoros_session, total_short_breaks_session, total_long_breaks_session,
+            daily_activity_name=current_daily_activity # Pass daily category to simple timer for display
+        )
+        # total_work_minutes_session += elapsed_minutes_simple # Sumamos el tiempo reportado por el simple timer
+        # This sum is now handled within run_simple_timer's logic for assignment
+        # if the user chooses to register time.
 
-            menu_options.append(f"  {RED}{option_counter}. Salir del programa{RESET}")
+        clear_screen()
+        print(f"{BOLD}{BLUE}¡Temporizador Simple finalizado!{RESET}")
+        # Now correctly displaying the added time if any was assigned by run_simple_timer
+        if elapsed_minutes_simple > 0:
+            print(f"{BOLD}Tiempo añadido al trabajo: {GREEN}{format_time_hh_mm_minutes(elapsed_minutes_simple)}{RESET}") 
+        else:
+            print(f"{LIGHT_GRAY}No se añadió tiempo al trabajo.{RESET}")
+
+        input(MSG_BACK_TO_MENU)
+        # ELIMINADO: No reiniciar last_activity_start_time aquí.
+        # last_activity_start_time = datetime.datetime.now()
+
+    def _run_change_activity_flow():
+        new_activity_choice = prompt_activity_category_choice(DEFAULT_DAILY_CATEGORIES, is_initial_setup=False)
+        if new_activity_choice: # Si el usuario seleccionó una nueva actividad (no canceló)
+            # Registra el segmento actual SOLO SI la actividad es DIFERENTE
+            if new_activity_choice != current_daily_activity:
+                # change_current_daily_activity se encarga de loguear el segmento saliente
+                # y de iniciar el nuevo con un nuevo last_activity_start_time.
+                change_current_daily_activity(new_activity_choice) 
+                print(f"{BOLD}{YELLOW}Actividad diaria cambiada a: {current_daily_activity}{RESET}")
+            else: # El usuario eligió la misma actividad o canceló y la actividad sigue siendo la misma
+                print(f"{BOLD}{LIGHT_GRAY}La actividad ya es '{current_daily_activity}'. No se realizó ningún cambio.{RESET}")
+                # No hay cambio de actividad general, last_activity_start_time no se toca.
+        else: # User cancelled from category selection (new_activity_choice is None)
+            print(f"{RED}No se cambió la actividad diaria.{RESET}")
+            # No hay cambio de actividad general, last_activity_start_time no se toca.
+        input(MSG_BACK_TO_MENU)
+        # Si se vuelve de este menú sin un cambio efectivo de actividad,
+        # last_activity_start_time no debe haberse modificado.
+
+    def _run_daily_summary_flow():
+        show_daily_activity_summary(daily_activity_log, current_daily_activity, last_activity_start_time, final_summary=False,
+                                    category_totals=daily_activity_totals)
+        # NO se modifica last_activity_start_time aquí. La actividad general actual continúa.
+
+    def _run_exit_flow():
+        clear_screen()
+        print(f"{BOLD}{BLUE}¡Gracias por usar el Temporador Pydoro!{RESET}")
+        print(f"{BOLD}Resumen final de la Sesión de Pomodoro:{RESET}")
+        print(f"{GREEN}Pomodoros completados: {total_pomodoros_session}{RESET}")
+        print(f"{ORANGE}Descansos cortos completados: {total_short_breaks_session}{RESET}")
+        print(f"{BLUE}Descansos largos completados: {total_long_breaks_session}{RESET}")
+        # Las variables total_work_minutes_session y total_break_minutes_session
+        # ya no se usan para mostrar aquí, ya que el tiempo productivo se asigna
+        # directamente a las categorías específicas o generales mediante daily_activity_log.
+        # Si se desea un total general de minutos de Pomodoro/Breaks, se necesitaría
+        # recalcularlo a partir de las categorías específicas o de los pomodoros/breaks completados.
+
+        # Loguear el segmento final y mostrar el resumen final de actividades diarias
+        finalize_session()
+
+        print(f"\n{BOLD}{LIGHT_GRAY}¡Hasta pronto! 👋{RESET}")
+        time.sleep(3)
+        return True # Termina el bucle del menú principal
+
+    def _build_main_menu_rows(menu_options):
+        """
+        Arma el menú principal completo: actividad actual, tiempo acumulado por categoría,
+        tiempo total del script y las opciones disponibles.
+        Args:
+            menu_options (tuple): Textos ya formateados de las opciones del menú.
+        Returns:
+            list: Las filas del menú tal como quedan en pantalla, empezando por la fila 1.
+        """
+        # Copia consistente del estado que change_current_daily_activity modifica
+        with state_lock:
+            activity = current_daily_activity
+            activity_start_time = last_activity_start_time
+            # Accumulated time per category: los segmentos cerrados ya están sumados en daily_activity_totals
+            current_accumulated_times = collections.defaultdict(float, daily_activity_totals)
+
+        # Calculate and display current segment's elapsed time *for display only*
+        current_segment_display_duration_seconds = 0
+        if activity_start_time:
+            current_segment_display_duration_seconds = (datetime.datetime.now() - activity_start_time).total_seconds()
+        
+        # Add the duration of the current partial segment that is still running
+        if activity is not None and current_segment_display_duration_seconds > 0:
+            current_accumulated_times[activity] += current_segment_display_duration_seconds
+        
+        # Solo se ordenan las categorías con tiempo (las que se muestran)
+        nonzero_accumulated = [item for item in current_accumulated_times.items() if item[1] > 0]
+        category_lines = [f"{CATEGORY_LINE_PREFIX[category]}{format_time_hh_mm_minutes(int(seconds // 60))}{RESET}"
+                          for category, seconds in sorted(nonzero_accumulated, key=BY_ACCUMULATED_SECONDS, reverse=True)]
+
+        # Mientras se espera la elección, _live_update_main_menu mantiene al día la duración y los acumulados
+        frame = MSG_MENU_FRAME_TEMPLATE.format_map({
+            'activity': activity,
+            'segment_duration': format_time_hh_mm_ss(int(current_segment_display_duration_seconds)),
+            'category_lines': "\n".join(category_lines) if category_lines else MSG_MENU_NO_CATEGORY_TIME,
+            'script_time': get_total_script_run_time(),
+            'menu_options': "\n".join(menu_options),
+        })
+        return frame.split("\n")
+
+    def _render_main_menu(menu_options):
+        """
+        Limpia la pantalla y dibuja el menú principal con un solo write.
+        Args:
+            menu_options (tuple): Textos ya formateados de las opciones del menú.
+        Returns:
+            list: Las filas dibujadas (ver _build_main_menu_rows).
+        """
+        rows = _build_main_menu_rows(menu_options)
+        sys.stdout.write(CLEAR_SCREEN + "\n".join(rows) + "\n")
+        sys.stdout.flush()
+        return rows
+
+    def _live_update_main_menu(menu_options, drawn_rows, terminal_size, stop_event):
+        """
+        Se ejecuta en un hilo aparte mientras input() espera la elección del usuario.
+        Cada vez que cambia el segundo del segmento actual reescribe solo las filas del menú
+        que cambiaron (duración, acumulados, tiempo total) y devuelve el cursor a donde
+        el usuario está escribiendo.
+        Args:
+            menu_options (tuple): Los textos de opciones con los que se dibujó el menú.
+            drawn_rows (list): Filas que hay en pantalla, empezando por la fila 1 (cada una ocupa una sola fila física).
+            terminal_size (os.terminal_size): Tamaño de la terminal con el que se dibujó el menú.
+            stop_event (threading.Event): Se activa cuando ya no se debe tocar la pantalla.
+        """
+        while True:
+            # Esperar hasta el próximo cambio de segundo de la duración mostrada
+            wait_seconds = 1.0
+            activity_start_time = last_activity_start_time # Una sola lectura: puede cambiar entre dos accesos
+            if activity_start_time:
+                wait_seconds -= (datetime.datetime.now() - activity_start_time).total_seconds() % 1.0
+            if stop_event.wait(wait_seconds):
+                return
+
+            if shutil.get_terminal_size() != terminal_size:
+                return # La terminal cambió de tamaño: el texto pudo reacomodarse y las filas ya no coinciden
+
+            rows = _build_main_menu_rows(menu_options)
+            if len(rows) != len(drawn_rows) or any(screen_rows(row, terminal_size.columns) > 1 for row in rows):
+                return # Cambió la cantidad de filas o alguna ya no entra en una: no se puede reescribir en el lugar
+
+            # \x1b[<fila>;1H mueve el cursor al inicio de esa fila y \x1b[2K la borra
+            changes = "".join(f"\x1b[{row_number};1H\x1b[2K{row}"
+                              for row_number, (row, drawn_row) in enumerate(zip(rows, drawn_rows), 1)
+                              if row != drawn_row)
+            if changes:
+                with stdout_lock:
+                    if stop_event.is_set():
+                        return
+                    sys.stdout.write(SAVE_CURSOR + changes + RESTORE_CURSOR)
+                    sys.stdout.flush()
+            drawn_rows = rows
+
+    def _build_menu_layout(allow_pomodoro_timer):
+        """
+        Arma una disposición del menú principal: textos de las opciones, acciones por número y total de opciones.
+        Args:
+            allow_pomodoro_timer (bool): Si se incluyen las opciones de Pomodoro y Temporizador Simple.
+        Returns:
+            tuple: (menu_options, menu_actions, option_counter)
+        """
+        menu_entries = []
+        # Only add Pomodoro and Simple Timer options if allowed by current activity
+        if allow_pomodoro_timer:
+            menu_entries.append((GREEN, "Iniciar nuevo conjunto de ciclos Pomodoro", _run_pomodoro_flow))
+            menu_entries.append((BLUE, "Iniciar Temporizador Simple (cuenta hacia arriba)", _run_simple_flow))
+
+        # Common options always available
+        menu_entries.append((ORANGE, "Ver Tiempo Productivo Categorizado (Estudio/Trabajo/Lectura)", display_specific_category_times)) # Renamed
+        menu_entries.append((YELLOW, "Cambiar Actividad Diaria General", _run_change_activity_flow))
+        menu_entries.append((LIGHT_GRAY, "Ver Resumen de Actividades Diarias Generales", _run_daily_summary_flow))
+        menu_entries.append((RED, "Salir del programa", _run_exit_flow))
+
+        # Numeración desde 1: el texto de cada opción y la acción que le corresponde
+        menu_options = tuple(f"  {color}{number}. {label}{RESET}" for number, (color, label, _) in enumerate(menu_entries, 1))
+        menu_actions = {str(number): action for number, (_, _, action) in enumerate(menu_entries, 1)}
+        return menu_options, menu_actions, len(menu_entries)
+
+    # Solo hay dos menús posibles (con o sin Pomodoro/Temporizador Simple): se arman una vez por sesión
+    menu_layouts = {allow: _build_menu_layout(allow) for allow in (True, False)}
+
+    while True:
+        try:
+            # Determine if Pomodoro/Simple Timer options should be shown
+            allow_pomodoro_timer = current_daily_activity in SPECIFIC_SUBCATEGORY_MAPPING
+            menu_options, menu_actions, option_counter = menu_layouts[allow_pomodoro_timer]
             option_exit = str(option_counter)
 
-            for option_text in menu_options:
-                print(option_text)
-            
-            valid_choices = [str(i) for i in range(1, option_counter + 1)] # All available options
+            drawn_rows = _render_main_menu(menu_options)
 
             # Revert to standard blocking input for stability
-            choice = input(f"{BOLD}Tu elección (1-{option_counter -1}): {RESET}").strip() # Corrected range in prompt
-            
-            # Input validation loop
-            while choice not in valid_choices:
-                print(f"{RED}Opción no válida. Por favor, ingresa un número entre 1 y {option_counter - 1}.{RESET}") # Corrected range in error
-                time.sleep(1) # Give user time to read error message
-                clear_screen() # Redraw menu
-                
-                # Recalculate duration for redrawn menu
-                if last_activity_start_time:
-                    current_segment_display_duration_seconds = (datetime.datetime.now() - last_activity_start_time).total_seconds()
-                
-                print(f"{BOLD}{GREEN}--- Bienvenido al Temporador Pydoro Personalizado ---{RESET}")
-                print(f"{BOLD}{LIGHT_GRAY}Outwork others consistently.{RESET}\n")
-                print(f"{BOLD}{BLUE}Actividad Diaria Actual: {current_daily_activity} (Duración en este segmento: {format_time_hh_mm_ss(current_segment_display_duration_seconds)}){RESET}\n")
-                
-                # Re-display accumulated time for categories
-                print(f"{BOLD}{BLUE}--- Tiempo Acumulado por Categoría General (Sesión Actual) ---{RESET}")
-                # Recalculate accumulated time per category for main menu display
-                current_accumulated_times_redraw = {cat: 0 for cat in DEFAULT_DAILY_CATEGORIES}
-                for entry in daily_activity_log:
-                    current_accumulated_times_redraw[entry['category']] = current_accumulated_times_redraw.get(entry['category'], 0) + entry['duration']
-                
-                if current_daily_activity is not None and last_activity_start_time is not None:
-                    current_running_duration_main_menu_redraw = (datetime.datetime.now() - last_activity_start_time).total_seconds()
-                    if current_running_duration_main_menu_redraw > 0:
-                        current_accumulated_times_redraw[current_daily_activity] = current_accumulated_times_redraw.get(current_daily_activity, 0) + current_running_duration_main_menu_redraw
-                
-                sorted_current_accumulated_redraw = sorted(current_accumulated_times_redraw.items(), key=lambda item: item[1], reverse=True)
-                has_current_accumulated_data_redraw = False
-                for category, seconds in sorted_current_accumulated_redraw:
-                    if seconds > 0:
-                        category_color = DAILY_CATEGORY_COLORS.get(category, LIGHT_GRAY)
-                        total_minutes = int(seconds / 60)
-                        print(f"  {category_color}{category}: {BOLD}{format_time_hh_mm_minutes(total_minutes)}{RESET}")
-                        has_current_accumulated_data_redraw = True
+            choice_prompt = f"{BOLD}Tu elección (1-{option_counter -1}): {RESET}" # Corrected range in prompt
+            invalid_choice_message = f"{RED}Opción no válida. Por favor, ingresa un número entre 1 y {option_counter - 1}.{RESET}" # Corrected range in error
+
+            # Mientras input() espera, un hilo mantiene al día la duración del segmento y los acumulados.
+            # Las filas se reescriben por posición absoluta (fila N del menú = fila N de la pantalla), así que
+            # solo se hace si ninguna fila se parte en dos por el ancho y la pantalla no se desplaza.
+            stop_live_update = threading.Event()
+            terminal_size = shutil.get_terminal_size()
+            prompt_row = len(drawn_rows) + 1
+            if (sys.stdout.isatty() and prompt_row < terminal_size.lines
+                    and all(screen_rows(row, terminal_size.columns) == 1 for row in drawn_rows)):
+                threading.Thread(target=_live_update_main_menu,
+                                 args=(menu_options, drawn_rows, terminal_size, stop_live_update),
+                                 daemon=True).start()
+            try:
+                choice_input = input(choice_prompt)
+                choice = choice_input.strip()
                 
-                if not has_current_accumulated_data_redraw:
-                    print(f"  {LIGHT_GRAY}Aún no hay tiempo registrado en categorías generales.{RESET}")
-                print(f"{BOLD}----------------------------------{RESET}\n")
-
-                # Re-display total script run time
-                print(f"{BOLD}{CYAN}Total de Tiempo Registrado (Script): {get_total_script_run_time()}{RESET}")
-                print("\n") # Espacio para separar
-
-
-                print(f"{BOLD}Selecciona una opción:{RESET}")
-                for option_text in menu_options:
-                    print(option_text)
-                choice = input(f"{BOLD}Tu elección (1-{option_counter - 1}): {RESET}").strip() # Corrected range in prompt
+                # Input validation loop: el menú sigue en pantalla, solo se muestra el error y se vuelve a preguntar
+                while choice and choice not in menu_actions:
+                    # Filas que ocupan la respuesta escrita y el error, hasta llegar a la nueva pregunta
+                    prompt_row += (screen_rows(choice_prompt + choice_input, terminal_size.columns)
+                                   + screen_rows(invalid_choice_message, terminal_size.columns))
+                    with stdout_lock:
+                        if prompt_row >= terminal_size.lines:
+                            stop_live_update.set() # La pantalla va a desplazarse: las filas ya no coincidirían
+                        print(invalid_choice_message)
+                    choice_input = input(choice_prompt)
+                    choice = choice_input.strip()
+            finally:
+                with stdout_lock: # Ninguna actualización queda a medio escribir al salir del menú
+                    stop_live_update.set()
+
+            if not choice:
+                continue # Enter sin elegir: se vuelve a dibujar el menú completo
             
             # --- Manejo de acciones basadas en la elección del usuario ---
-            
-            if allow_pomodoro_timer and choice == option_pomodoro:
-                # No llamar a change_current_daily_activity aquí.
-                # El Pomodoro es parte del segmento de la actividad diaria actual.
-                # Los valores por defecto ahora vienen de la definición de run_pomodoro
-                
-                work, short_break, long_break, cycles = 90, 15, 45, 4 # Default values (aligned with run_pomodoro defaults)
-
-                while True:
-                    customize_choice = input(f"{BOLD}¿Quieres personalizar la configuración para este conjunto de ciclos? ({GREEN}s{RESET}/{RED}n{RESET}): {RESET}").lower().strip()
-                    if customize_choice in ['s', 'n']:
-                        break
-                    else:
-                        print(f"{RED}Opción no válida. Por favor, ingresa 's' o 'n'.{RESET}")
-                        time.sleep(1)
-                
-                if customize_choice == 's':
-                    while True:
-                        try:
-                            work = int(input(f"{YELLOW}Duración del período de TRABAJO (minutos): {RESET}"))
-                            short_break = int(input(f"{YELLOW}Duración del DESCANSO CORTO (minutos): {RESET}"))
-                            long_break = int(input(f"{YELLOW}Duración del DESCANSO LARGO (minutos): {RESET}"))
-                            cycles = int(input(f"{YELLOW}Número de ciclos Pomodoro (ej. 4 para descanso largo): {RESET}"))
-                            
-                            if work <= 0 or short_break <= 0 or long_break <= 0 or cycles <= 0:
-                                print(f"{RED}Las duraciones y el número de ciclos deben ser valores POSITIVOS. Intenta de nuevo.{RESET}")
-                                time.sleep(1)
-                            else:
-                                break
-                        except ValueError:
-                            print(f"{RED}Entrada inválida. Por favor, ingresa SOLO NÚMEROS enteros.{RESET}")
-                            time.sleep(1)
-                            
-                completed_pom, completed_short_break, completed_long_break = run_pomodoro(
-                    work, short_break, long_break, cycles,
-                    total_pomodoros_session, total_short_breaks_session, total_long_breaks_session,
-                    daily_activity_name=current_daily_activity # Pass daily category to countdown for display
-                )
-                
-                total_pomodoros_session += completed_pom
-                total_short_breaks_session += completed_short_break
-                total_long_breaks_session += completed_long_break
-                # total_work_minutes_session and total_break_minutes_session are now updated
-                # directly by assign_time_to_specific_category if specific,
-                # or not tracked at this higher level if the user chose not to sum to specific.
-                # The Pomodoros completed counter is the main high-level metric here.
-
-                clear_screen()
-                print(f"{BOLD}{BLUE}¡Conjunto de ciclos Pomodoro completado!{RESET}")
-                print(f"{BOLD}Resumen de este conjunto:{RESET}")
-                print(f"{GREEN}Pomodoros completados: {completed_pom}{RESET}")
-                print(f"{ORANGE}Descansos cortos completados: {completed_short_break}{RESET}")
-                print(f"{BLUE}Descansos largos completados: {completed_long_break}{RESET}")
-                input(f"\n{BOLD}{LIGHT_GRAY}Presiona Enter para volver al menú principal...{RESET}")
-                # ELIMINADO: No reiniciar last_activity_start_time aquí.
-                # last_activity_start_time = datetime.datetime.now()
-                
-            elif allow_pomodoro_timer and choice == option_simple_timer: 
-                # No llamar a change_current_daily_activity aquí.
-                # El temporizador simple es parte del segmento de la actividad diaria actual.
-                elapsed_minutes_simple = run_simple_timer(
-                    total_pomodoros_session, total_short_breaks_session, total_long_breaks_session,
-                    daily_activity_name=current_daily_activity # Pass daily category to simple timer for display
-                )
-                # total_work_minutes_session += elapsed_minutes_simple # Sumamos el tiempo reportado por el simple timer
-                # This sum is now handled within run_simple_timer's logic for assignment
-                # if the user chooses to register time.
-
-                clear_screen()
-                print(f"{BOLD}{BLUE}¡Temporizador Simple finalizado!{RESET}")
-                # Now correctly displaying the added time if any was assigned by run_simple_timer
-                if elapsed_minutes_simple > 0:
-                    print(f"{BOLD}Tiempo añadido al trabajo: {GREEN}{format_time_hh_mm_minutes(elapsed_minutes_simple)}{RESET}") 
-                else:
-                    print(f"{LIGHT_GRAY}No se añadió tiempo al trabajo.{RESET}")
-
-                input(f"\n{BOLD}{LIGHT_GRAY}Presiona Enter para volver al menú principal...{RESET}")
-                # ELIMINADO: No reiniciar last_activity_start_time aquí.
-                # last_activity_start_time = datetime.datetime.now()
-
-            elif choice == option_specific_cat_summary: 
-                display_specific_category_times()
-                # NO se modifica last_activity_start_time aquí. La actividad general actual continúa.
-
-            elif choice == option_change_daily_activity: 
-                new_activity_choice = prompt_activity_category_choice(DEFAULT_DAILY_CATEGORIES, is_initial_setup=False)
-                if new_activity_choice: # Si el usuario seleccionó una nueva actividad (no canceló)
-                    # Registra el segmento actual SOLO SI la actividad es DIFERENTE
-                    if new_activity_choice != current_daily_activity:
-                        # change_current_daily_activity se encarga de loguear el segmento saliente
-                        # y de iniciar el nuevo con un nuevo last_activity_start_time.
-                        change_current_daily_activity(new_activity_choice) 
-                        print(f"{BOLD}{YELLOW}Actividad diaria cambiada a: {current_daily_activity}{RESET}")
-                    else: # El usuario eligió la misma actividad o canceló y la actividad sigue siendo la misma
-                        print(f"{BOLD}{LIGHT_GRAY}La actividad ya es '{current_daily_activity}'. No se realizó ningún cambio.{RESET}")
-                        # No hay cambio de actividad general, last_activity_start_time no se toca.
-                else: # User cancelled from category selection (new_activity_choice is None)
-                    print(f"{RED}No se cambió la actividad diaria.{RESET}")
-                    # No hay cambio de actividad general, last_activity_start_time no se toca.
-                input(f"\n{BOLD}{LIGHT_GRAY}Presiona Enter para volver al menú principal...{RESET}")
-                # Si se vuelve de este menú sin un cambio efectivo de actividad,
-                # last_activity_start_time no debe haberse modificado.
-
-            elif choice == option_refresh_view: # New option to refresh the menu view
-                # No log segment change needed. Just re-calculate display duration and loop.
-                print(f"{BOLD}{GREEN}Vista del menú actualizada.{RESET}")
-                time.sleep(0.5) # Small pause for user to see message
-                # The outer loop will clear_screen and redraw automatically
-            
-            elif choice == option_daily_summary: 
-                show_daily_activity_summary(daily_activity_log, current_daily_activity, last_activity_start_time, final_summary=False)
-                # NO se modifica last_activity_start_time aquí. La actividad general actual continúa.
-            
-            elif choice == option_exit: 
-                clear_screen()
-                print(f"{BOLD}{BLUE}¡Gracias por usar el Temporador Pydoro!{RESET}")
-                print(f"{BOLD}Resumen final de la Sesión de Pomodoro:{RESET}")
-                print(f"{GREEN}Pomodoros completados: {total_pomodoros_session}{RESET}")
-                print(f"{ORANGE}Descansos cortos completados: {total_short_breaks_session}{RESET}")
-                print(f"{BLUE}Descansos largos completados: {total_long_breaks_session}{RESET}")
-                # Las variables total_work_minutes_session y total_break_minutes_session
-                # ya no se usan para mostrar aquí, ya que el tiempo productivo se asigna
-                # directamente a las categorías específicas o generales mediante daily_activity_log.
-                # Si se desea un total general de minutos de Pomodoro/Breaks, se necesitaría
-                # recalcularlo a partir de las categorías específicas o de los pomodoros/breaks completados.
-                
-                # Loguear el segmento final antes de salir.
-                change_current_daily_activity(None) # Esto loguea el último segmento y pone las variables globales a None
-
-                # Mostrar resumen final de actividades diarias
-                show_daily_activity_summary(daily_activity_log, None, None, final_summary=True) # Pasamos None para actividad activa ya que se logueó
-
-                print(f"\n{BOLD}{LIGHT_GRAY}¡Hasta pronto! 👋{RESET}")
-                time.sleep(3)
+            if menu_actions[choice](): # Solo la opción de salir devuelve True
                 break # Exit main loop
 
         except KeyboardInterrupt:
@@ -1180,10 +1750,8 @@ if __name__ == "__main__":
         main()
     except KeyboardInterrupt:
         print(f"\n{RED}¡Pydoro se cerró abruptamente con CTRL+C fuera del menú!{RESET}")
-        # Intentar loguear el último segmento activo al salir abruptamente
-        if current_daily_activity is not None and last_activity_start_time is not None:
-            change_current_daily_activity(None) # Loguea el último segmento
-        show_daily_activity_summary(daily_activity_log, None, None, final_summary=True) # Mostrar resumen al salir abruptamente
     finally:
+        # Único punto de cierre: con CTRL+C, sys.exit o un error inesperado tampoco se pierde el último segmento
+        finalize_session()
         print("Gracias por usar Pydoro.")
 